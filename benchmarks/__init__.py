@@ -0,0 +1,6 @@
+"""
+SoroEditorの検索・ハイライト・置換などの処理時間を計測するベンチマーク
+
+    python -m benchmarks --boxes 3 --size 2 --output result.json
+    python -m benchmarks --baseline result.json
+"""
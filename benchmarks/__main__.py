@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
+
+def parseArgs(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="合成した原稿で検索・ハイライト・置換の処理時間を計測する",
+    )
+    parser.add_argument("--boxes", type=int, default=3, help="ボックス数")
+    parser.add_argument(
+        "--size", type=float, default=1.0, help="ボックスごとの大きさ(MB)"
+    )
+    parser.add_argument(
+        "--language", choices=["japanese", "ascii"], default="japanese"
+    )
+    parser.add_argument("--term", default=None, help="検索語")
+    parser.add_argument("--repl", default="置換後", help="置換後の文字列")
+    parser.add_argument("--regex", action="store_true")
+    parser.add_argument(
+        "--density",
+        type=float,
+        default=0.001,
+        help="語が検索語になる確率",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--cases", nargs="*", default=None, help="実行するケース"
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="ケースごとのPythonのメモリ使用量の最大値を計測する",
+    )
+    parser.add_argument("--output", help="結果を書き出すJSONファイル")
+    parser.add_argument("--baseline", help="比較対象の結果のJSONファイル")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="基準より遅くなったとみなす割合",
+    )
+    return parser.parse_args(argv)
+
+
+def peakRssKiB() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOSではバイト単位
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def runCase(case, context, repeat: int, traceMemory: bool) -> dict:
+    runs = []
+    peak = None
+    for _ in range(repeat):
+        if traceMemory:
+            tracemalloc.start()
+        runs.append(case(context))
+        if traceMemory:
+            current, runPeak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peak = max(peak or 0, runPeak // 1024)
+    return {
+        "runs": runs,
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "pythonPeakKiB": peak,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    基準の結果と中央値を比較し、閾値を超えて遅くなったケース名を返す
+    """
+    regressions = []
+    print(f"{'case':<20s} {'baseline':>10s} {'current':>10s} {'ratio':>7s}")
+    for name, result in results["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"{name:<20s} {'-':>10s} {result['median']:>10.4f}")
+            continue
+        ratio = result["median"] / base["median"] if base["median"] else 0
+        mark = ""
+        if ratio > 1 + threshold:
+            mark = "  *"
+            regressions.append(name)
+        print(
+            f"{name:<20s} {base['median']:>10.4f} {result['median']:>10.4f} "
+            f"{ratio:>7.2f}{mark}"
+        )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parseArgs(argv)
+
+    # 画面を持たない環境で動かし、利用者の設定ファイルやログに触れない
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    home = tempfile.mkdtemp(prefix="soroeditor-benchmark-")
+    os.environ["HOME"] = home
+    os.environ["USERPROFILE"] = home
+    sys.argv = sys.argv[:1]
+    # 保存先もこの中に作るため、終了時にまとめて削除する
+    try:
+        return run(args)
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+def run(args: argparse.Namespace) -> int:
+    from PySide6 import __version__ as pysideVersion
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication([])
+
+    from soroeditor_qt.MainWindow import MainWindow
+
+    from .cases import CASES, Context
+    from .synthetic import makeProject
+
+    term = args.term
+    if term is None:
+        term = "検索語" if args.language == "japanese" else "needle"
+
+    window = MainWindow()
+    numberOfBoxes = min(args.boxes, len(window.textEditor.textEdits))
+    if numberOfBoxes < args.boxes:
+        print(f"ボックス数は{numberOfBoxes}に制限されます", file=sys.stderr)
+    texts = makeProject(
+        numberOfBoxes,
+        int(args.size * 1024 * 1024),
+        args.language,
+        term,
+        args.density,
+        args.seed,
+    )
+    for textEdit, text in zip(window.textEditor.textEdits, texts):
+        textEdit.setPlainText(text)
+
+    context = Context(window, texts, term, args.repl, args.regex)
+    names = args.cases or list(CASES)
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "pyside": pysideVersion,
+            "platform": platform.platform(),
+        },
+        "parameters": {
+            "boxes": numberOfBoxes,
+            "size": args.size,
+            "language": args.language,
+            "term": term,
+            "regex": args.regex,
+            "density": args.density,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    for name in names:
+        result = runCase(CASES[name], context, args.repeat, args.trace_memory)
+        results["results"][name] = result
+        print(
+            f"{name:<20s} median {result['median']:.4f}s "
+            f"min {result['min']:.4f}s",
+            file=sys.stderr,
+        )
+    results["peakRssKiB"] = peakRssKiB()
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, mode="wt", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, mode="rt", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+
+    # 未保存の確認を出さずに閉じる
+    window.markAsSaved()
+    window.close()
+    app.quit()
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import os
+import tempfile
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Callable
+
+import yaml
+from PySide6.QtWidgets import QMainWindow
+
+from soroeditor_qt import DataOperation
+
+
+@dataclass
+class Context:
+    window: QMainWindow
+    texts: list[str]
+    term: str
+    repl: str
+    regex: bool
+    state: dict = field(default_factory=dict)
+
+    @property
+    def textEdits(self):
+        return self.window.textEditor.textEdits[: len(self.texts)]
+
+
+def resetSearch(context: Context):
+    for textEdit in context.textEdits:
+        textEdit.matchIndex.setPattern("", False)
+
+
+def restoreTexts(context: Context):
+    for textEdit, text in zip(context.textEdits, context.texts):
+        if textEdit.toPlainText() != text:
+            textEdit.setPlainText(text)
+
+
+def searchAll(context: Context) -> list:
+    resetSearch(context)
+    return [
+        textEdit.search(context.term, context.regex, wait=True)
+        for textEdit in context.textEdits
+    ]
+
+
+def search(context: Context) -> float:
+    """
+    検索条件を変更した直後の、全ボックスの文書全体の検索
+    """
+    resetSearch(context)
+    elapsed = 0.0
+    for textEdit in context.textEdits:
+        start = perf_counter()
+        textEdit.search(context.term, context.regex, wait=True)
+        elapsed += perf_counter() - start
+    return elapsed
+
+
+def highlight(context: Context) -> float:
+    """
+    全ボックスの検索結果のハイライト
+    """
+    matchSets = searchAll(context)
+    start = perf_counter()
+    for textEdit, matchSet in zip(context.textEdits, matchSets):
+        textEdit.highlightMatches(matchSet)
+    return perf_counter() - start
+
+
+def replaceAll(context: Context) -> float:
+    """
+    全ボックスの一致箇所の一括置換
+    計測後は元の文章に戻す
+    """
+    matchSets = searchAll(context)
+    start = perf_counter()
+    for textEdit, matchSet in zip(context.textEdits, matchSets):
+        textEdit.replaceAll(matchSet, context.repl)
+    elapsed = perf_counter() - start
+    # 取り消しでは置換より後の編集しか戻らない場合があるため、設定し直す
+    restoreTexts(context)
+    return elapsed
+
+
+def searchWindowReset(context: Context) -> float:
+    """
+    検索ウィンドウで検索語を入力してから、全ボックスの検索結果が
+    ハイライトされるまでの一連の処理
+    """
+    resetSearch(context)
+    context.window.qAction["search"]["Search"].trigger()
+    searchWindow = context.window.subWindows["SearchWindow"]
+    searchWindow.regexCheckBox.setChecked(context.regex)
+
+    searchWindow.searchInput.setText(context.term)
+    start = perf_counter()
+    searchWindow.reset(wait=True)
+    elapsed = perf_counter() - start
+
+    searchWindow.close()
+    return elapsed
+
+
+def projectData(context: Context) -> dict:
+    if "projectData" not in context.state:
+        titles = [f"ボックス{i + 1}" for i in range(len(context.texts))]
+        data = DataOperation.makeSaveData(
+            context.texts, titles, context.window.projectSetting.data()
+        )
+        yml = DataOperation.dumpYaml(data, yaml.SafeDumper)
+        context.state["projectData"] = data, yml
+    return context.state["projectData"]
+
+
+def yamlDump(context: Context) -> float:
+    """
+    プロジェクトのYAMLへの変換(libyamlが利用できる場合はC実装)
+    """
+    data, _ = projectData(context)
+    start = perf_counter()
+    DataOperation.dumpYaml(data)
+    return perf_counter() - start
+
+
+def yamlDumpPure(context: Context) -> float:
+    """
+    プロジェクトのYAMLへの変換(純Python実装)
+    """
+    data, _ = projectData(context)
+    start = perf_counter()
+    DataOperation.dumpYaml(data, yaml.SafeDumper)
+    return perf_counter() - start
+
+
+def yamlLoad(context: Context) -> float:
+    """
+    プロジェクトのYAMLの読み込み(libyamlが利用できる場合はC実装)
+    """
+    _, yml = projectData(context)
+    start = perf_counter()
+    DataOperation.loadYaml(yml)
+    return perf_counter() - start
+
+
+def yamlLoadPure(context: Context) -> float:
+    """
+    プロジェクトのYAMLの読み込み(純Python実装)
+    """
+    _, yml = projectData(context)
+    start = perf_counter()
+    DataOperation.loadYaml(yml, yaml.SafeLoader)
+    return perf_counter() - start
+
+
+def saveFile(context: Context, edit: bool) -> float:
+    if "saveDirectory" not in context.state:
+        # 終了時に削除される一時的なホームディレクトリの中に作る
+        context.state["saveDirectory"] = tempfile.mkdtemp(
+            dir=os.path.expanduser("~")
+        )
+    filePath = os.path.join(context.state["saveDirectory"], "project.sepf")
+    if edit:
+        context.textEdits[0].insertPlainText("a")
+    else:
+        context.window.fragmentCache.clear()
+    start = perf_counter()
+    context.window.startSave(filePath, wait=True)
+    elapsed = perf_counter() - start
+    if edit:
+        restoreTexts(context)
+    return elapsed
+
+
+def saveAll(context: Context) -> float:
+    """
+    変換済みの断片を使わないプロジェクト全体の保存
+    """
+    return saveFile(context, edit=False)
+
+
+def saveEdited(context: Context) -> float:
+    """
+    1つのボックスのみを編集した後の保存
+    """
+    return saveFile(context, edit=True)
+
+
+CASES: dict[str, Callable[[Context], float]] = {
+    "search": search,
+    "highlight": highlight,
+    "replaceAll": replaceAll,
+    "searchWindowReset": searchWindowReset,
+    "yamlDump": yamlDump,
+    "yamlDumpPure": yamlDumpPure,
+    "yamlLoad": yamlLoad,
+    "yamlLoadPure": yamlLoadPure,
+    "saveAll": saveAll,
+    "saveEdited": saveEdited,
+}
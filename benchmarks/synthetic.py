@@ -0,0 +1,61 @@
+import random
+from typing import Literal
+
+ASCII_WORDS = [
+    "the", "of", "and", "to", "in", "was", "he", "that", "it", "his",
+    "her", "with", "for", "had", "as", "you", "on", "she", "at", "but",
+    "morning", "river", "letter", "window", "quietly", "remember",
+]  # fmt: skip
+
+JAPANESE_WORDS = [
+    "の", "に", "は", "を", "た", "が", "で", "て", "と", "し",
+    "彼", "彼女", "朝", "川", "手紙", "窓", "静かに", "思い出す",
+    "言った", "見た", "。", "、", "「", "」",
+]  # fmt: skip
+
+Language = Literal["ascii", "japanese"]
+
+
+def makeText(
+    size: int,
+    language: Language = "japanese",
+    term: str = "検索語",
+    density: float = 0.001,
+    seed: int = 0,
+) -> str:
+    """
+    UTF-8でおよそsizeバイトの文章を生成する
+    各語はdensityの確率でtermに置き換わる
+    """
+    rng = random.Random(seed)
+    words = JAPANESE_WORDS if language == "japanese" else ASCII_WORDS
+    separator = "" if language == "japanese" else " "
+
+    paragraphs = []
+    total = 0
+    while total < size:
+        count = rng.randint(5, 80)
+        paragraph = separator.join(
+            term if rng.random() < density else rng.choice(words)
+            for _ in range(count)
+        )
+        paragraphs.append(paragraph)
+        total += len(paragraph.encode("utf-8")) + 1
+    return "\n".join(paragraphs)
+
+
+def makeProject(
+    boxes: int,
+    size: int,
+    language: Language = "japanese",
+    term: str = "検索語",
+    density: float = 0.001,
+    seed: int = 0,
+) -> list[str]:
+    """
+    ボックスごとの文章のリストを生成する
+    """
+    return [
+        makeText(size, language, term, density, seed + box)
+        for box in range(boxes)
+    ]
@@ -4,7 +4,7 @@ from PySide6.QtGui import QFont
 from PySide6.QtWidgets import QLabel, QWidget
 
 from .__version__ import __version__
-from .Icon import Icon
+from .Icon import pixmap
 
 
 class AboutWindow(QWidget):
@@ -16,7 +16,7 @@ class AboutWindow(QWidget):
 
     def makeLayout(self):
         icon = QLabel("SoroEditorアイコン")
-        icon.setPixmap(Icon().AppIcon.scaled(256, 256))
+        icon.setPixmap(pixmap("AppIcon", 256))
         QFont
         self.font()
         label = QLabel()
@@ -1,54 +1,201 @@
+import lzma
+import zlib
+from collections.abc import Mapping
+
 import yaml as __y
 
-from . import FileOperation, SettingOperation
+from . import FileOperation, ProjectArchive, SettingOperation
 from .logSetting import logSetting
 
 logger = logSetting(__name__)
 
+# libyamlが利用できる場合はC実装のLoader/Dumperを使う
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+
+    LIBYAML = True
+except ImportError:
+    from yaml import SafeDumper, SafeLoader  # type: ignore
+
+    LIBYAML = False
+
 
-def makeSaveData(texts: list[str | None], titles: list[str | None]) -> dict:
+def makeSaveData(
+    texts: list[str | None], titles: list[str | None], settings: Mapping
+) -> dict:
+    """
+    保存するデータを作る
+    設定はスナップショットから変更可能なdictに変換して含める
+    """
     data: dict = {}
     for i, (text, title) in enumerate(zip(texts, titles)):
         data[i] = {}
         if type(text) is str:
             data[i]["text"] = text.rstrip("\r\n")
         data[i]["title"] = title
-    settings = {
-        key: value
-        for key, value in SettingOperation.projectSettingData().items()
-        if key != "FileHistory"
+    return {
+        "data": data,
+        "settings": {
+            key: SettingOperation.thaw(value)
+            for key, value in settings.items()
+            if key != "FileHistory"
+        },
     }
-    return {"data": data, "settings": settings}
+
+
+def dumpYaml(data, dumper=SafeDumper, stream=None) -> str | None:
+    """
+    データをYAMLの文字列に変換する
+    yaml.safe_dumpと同じ出力をlibyamlが利用できる場合はC実装で行う
+    streamを指定した場合は文字列を作らずにstreamへ書き込む
+    """
+    return __y.dump(data, stream, Dumper=dumper, allow_unicode=True)
+
+
+def loadYaml(yml, loader=SafeLoader):
+    """
+    YAMLの文字列またはストリームを読み込む
+    yaml.safe_loadと同じ結果をlibyamlが利用できる場合はC実装で得る
+    """
+    return __y.load(yml, Loader=loader)
 
 
 def makeDataToYaml(data: dict) -> str:
     try:
-        return __y.safe_dump(data, allow_unicode=True)
+        return dumpYaml(data)
     except (
         __y.YAMLError,
         __y.representer.RepresenterError,
         __y.resolver.ResolverError,
         __y.emitter.EmitterError,
     ) as e:
-        logger.error(f"Failed to dump Yaml data: {e}")
+        logger.error("Failed to dump Yaml data: %s", e)
         return ""
         # ファイルが読み込めなかった場合
 
 
-def saveProjectFile(
-    texts: list[str | None], titles: list[str | None], filePath: str
+def isBinaryProjectFile(filePath: str) -> bool:
+    """
+    拡張子が.sepbの場合はバイナリ形式で保存する
+    """
+    return str(filePath).lower().endswith(".sepb")
+
+
+def makeDataToBinary(data: dict, compression: str = "None") -> bytes:
+    """
+    データをバイナリ形式に変換する
+    本文はボックスごとのセクションに、残りはYAMLのメタデータに格納する
+    """
+    texts = {}
+    metadata = dict(data)
+    metadata["data"] = {}
+    for i, box in data.get("data", {}).items():
+        box = dict(box)
+        if type(box.get("text")) is str:
+            texts[i] = box.pop("text")
+        metadata["data"][i] = box
+    yml = makeDataToYaml(metadata)
+    if not yml:
+        return b""
+    return ProjectArchive.dumpArchive(yml, texts, compression)
+
+
+def writeProjectData(
+    data: dict, filePath: str, fragments: dict | None = None
 ) -> bool:
-    return FileOperation.writeToFile(
-        makeDataToYaml(makeSaveData(texts, titles)), filePath
+    """
+    データを拡張子に応じた形式でファイルに書き込む
+    プロジェクト設定のCompressionに応じて圧縮する
+    YAMLで保存する場合、fragmentsに含まれるボックスは変換済みの断片を使い、
+    それ以外のボックスを変換した断片をfragmentsに追加する
+    """
+    compression = data.get("settings", {}).get("Compression", "None")
+    if isBinaryProjectFile(filePath):
+        binary = makeDataToBinary(data, compression)
+        return bool(binary) and FileOperation.writeBytesToFile(
+            binary, filePath
+        )
+    return writeYaml(
+        data, filePath, compression, {} if fragments is None else fragments
     )
 
 
+def makeBoxFragment(i, box: dict) -> str:
+    """
+    ボックス一つ分のYAMLの断片を返す
+    断片を番号順に"data:"の行の後ろに並べるとdataのYAMLになる
+    """
+    return dumpYaml({"data": {i: box}}).removeprefix("data:\n")
+
+
+def iterYamlParts(data: dict, fragments: dict):
+    """
+    データのYAMLを断片ごとに返す
+    safe_dumpと同じくキーの順に並べるため、dataより前に並ぶキーがある場合や
+    ボックスが無い場合は全体をまとめて変換する
+    """
+    boxes = data.get("data")
+    rest = {key: value for key, value in data.items() if key != "data"}
+    if not boxes or not all(
+        isinstance(key, str) and key > "data" for key in rest
+    ):
+        yield dumpYaml(data)
+        return
+    yield "data:\n"
+    for i in sorted(boxes):
+        if i not in fragments:
+            fragments[i] = makeBoxFragment(i, boxes[i])
+        yield fragments[i]
+    if rest:
+        yield dumpYaml(rest)
+
+
+def writeYaml(
+    data: dict, filePath: str, compression: str, fragments: dict
+) -> bool:
+    """
+    データを断片ごとにYAMLに変換しながらファイルに書き込む
+    compressionを指定した場合は書き込みながら圧縮する
+    """
+    try:
+        with FileOperation.atomicTextStream(filePath, compression) as f:
+            for part in iterYamlParts(data, fragments):
+                f.write(part)
+    except (
+        __y.YAMLError,
+        __y.representer.RepresenterError,
+        __y.resolver.ResolverError,
+        __y.emitter.EmitterError,
+    ) as e:
+        logger.error("Failed to dump Yaml data: %s", e)
+        return False
+    except (OSError, UnicodeEncodeError) as e:
+        logger.error("Failed to write to the file %s: %s", filePath, e)
+        return False
+    logger.info("Wrote to the file: %s", filePath)
+    return True
+
+
+def saveProjectFile(
+    texts: list[str | None],
+    titles: list[str | None],
+    settings: Mapping,
+    filePath: str,
+) -> bool:
+    return writeProjectData(makeSaveData(texts, titles, settings), filePath)
+
+
 def openProjectFile(filePath) -> dict:
+    if ProjectArchive.isArchive(filePath):
+        return openBinaryProjectFile(filePath)
+    if FileOperation.detectCompression(filePath) != "None":
+        return openCompressedProjectFile(filePath)
     yml = FileOperation.openFile(filePath)
     dic: dict = {}
     if yml:
         try:
-            dic = __y.safe_load(yml)
+            dic = loadYaml(yml)
         except (
             KeyError,
             UnicodeDecodeError,
@@ -56,5 +203,84 @@ def openProjectFile(filePath) -> dict:
             __y.scanner.ScannerError,
             __y.constructor.ConstructorError,
         ) as e:
-            logger.error(f"Failed to load Yaml data.: {e}")
+            logger.error("Failed to load Yaml data.: %s", e)
+    if dic and not isProjectData(dic):
+        logger.error("Not a project file: %s", filePath)
+        return {}
+    return dic
+
+
+def openCompressedProjectFile(filePath) -> dict:
+    """
+    圧縮されたプロジェクトファイルを展開しながら読み込む
+    """
+    dic: dict = {}
+    try:
+        with FileOperation.openTextStream(filePath) as f:
+            dic = loadYaml(f)
+    except (
+        OSError,
+        EOFError,
+        zlib.error,
+        lzma.LZMAError,
+        UnicodeDecodeError,
+        __y.YAMLError,
+    ) as e:
+        logger.error("Failed to load the compressed project file.: %s", e)
+        return {}
+    if not isProjectData(dic):
+        logger.error("Not a project file: %s", filePath)
+        return {}
+    logger.info("Open the file: %s", filePath)
     return dic
+
+
+def isProjectData(dic) -> bool:
+    """
+    dicがボックス番号ごとのdictを"data"に持つdictであればTrueを返す
+    """
+    return (
+        isinstance(dic, dict)
+        and isinstance(dic.get("data"), dict)
+        and all(isinstance(box, dict) for box in dic["data"].values())
+    )
+
+
+def openBinaryProjectFile(
+    filePath, boxes: list[int] | None = None, metadataOnly: bool = False
+) -> dict:
+    """
+    バイナリ形式のプロジェクトファイルを開く
+    boxesを指定した場合はそのボックスの本文のみを、
+    metadataOnlyがTrueの場合は本文を除いたデータのみを読み込む
+    """
+    dic: dict = {}
+    try:
+        with ProjectArchive.ProjectArchive(filePath) as archive:
+            dic = loadYaml(archive.metadata())
+            if not isProjectData(dic):
+                raise ProjectArchive.ArchiveError("Broken metadata")
+            if not metadataOnly:
+                for i, box in dic.get("data", {}).items():
+                    if (boxes is None or i in boxes) and archive.hasText(i):
+                        box["text"] = archive.text(i)
+    except (
+        OSError,
+        UnicodeDecodeError,
+        ProjectArchive.ArchiveError,
+        __y.YAMLError,
+    ) as e:
+        logger.error("Failed to load the project archive.: %s", e)
+        return {}
+    logger.info("Open the file: %s", filePath)
+    return dic
+
+
+def convertProjectFile(sourcePath: str, destinationPath: str) -> bool:
+    """
+    プロジェクトファイルを保存先の拡張子に応じた形式に変換する
+    """
+    data = openProjectFile(sourcePath)
+    if not data:
+        return False
+    return writeProjectData(data, destinationPath)
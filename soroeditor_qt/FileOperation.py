@@ -1,38 +1,166 @@
+import gzip
+import io
+import lzma
+import os
+import tempfile
+import zlib
+from contextlib import contextmanager
+
 from .logSetting import logSetting
 
 logger = logSetting(__name__)
 
+# 新しく作るファイルの権限に使う
+__UMASK = os.umask(0)
+os.umask(__UMASK)
+
+# 圧縮形式とファイルの先頭のマジックナンバー
+# zlibはgzip形式で、lzmaはxz形式で保存する
+COMPRESSIONS = ("None", "zlib", "lzma")
+__MAGICNUMBERS = {
+    "zlib": b"\x1f\x8b",
+    "lzma": b"\xfd7zXZ\x00",
+}
+
+
+@contextmanager
+def atomicWrite(
+    filePath: str, mode: str = "wt", encoding: str | None = "utf-8"
+):
+    """
+    同じディレクトリの一時ファイルに書き込み、fsyncしてから置き換える
+    書き込み中に失敗しても元のファイルは壊れない
+    """
+    directory = os.path.dirname(os.path.abspath(filePath))
+    fd, tempPath = tempfile.mkstemp(
+        prefix=f".{os.path.basename(filePath)}.", suffix=".tmp", dir=directory
+    )
+    try:
+        with os.fdopen(fd, mode=mode, encoding=encoding) as f:
+            if os.path.exists(filePath):
+                os.chmod(tempPath, os.stat(filePath).st_mode & 0o7777)
+            else:
+                os.chmod(tempPath, 0o666 & ~__UMASK)
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tempPath, filePath)
+    except BaseException:
+        try:
+            os.remove(tempPath)
+        except OSError:
+            pass
+        raise
+
 
 def writeToFile(data: str, filePath: str) -> bool:
     try:
-        with open(filePath, mode="wt", encoding="utf-8") as f:
+        with atomicWrite(filePath) as f:
             # ファイルに書き込む
             f.write(data)
-    except (FileNotFoundError, UnicodeDecodeError) as e:
-        errorType = type(e).__name__
-        errorMessage = str(e)
+    except (OSError, UnicodeEncodeError) as e:
         logger.error(
-            f"An error of type {errorType} occurred while writing to the file "
-            f"{filePath}: {errorMessage}"
+            "An error of type %s occurred while writing to the file %s: %s",
+            type(e).__name__,
+            filePath,
+            e,
         )
         return False
     else:
-        logger.info(f"Wrote to the file: {filePath}")
+        logger.info("Wrote to the file: %s", filePath)
         return True
 
 
+def writeBytesToFile(data: bytes, filePath: str) -> bool:
+    try:
+        with atomicWrite(filePath, mode="wb", encoding=None) as f:
+            f.write(data)
+    except OSError as e:
+        logger.error(
+            "An error of type %s occurred while writing to the file %s: %s",
+            type(e).__name__,
+            filePath,
+            e,
+        )
+        return False
+    else:
+        logger.info("Wrote to the file: %s", filePath)
+        return True
+
+
+def detectCompression(filePath: str) -> str:
+    """
+    ファイルの先頭のマジックナンバーから圧縮形式を判定する
+    """
+    try:
+        with open(filePath, mode="rb") as f:
+            head = f.read(max(len(magic) for magic in __MAGICNUMBERS.values()))
+    except OSError:
+        return "None"
+    for compression, magic in __MAGICNUMBERS.items():
+        if head.startswith(magic):
+            return compression
+    return "None"
+
+
+@contextmanager
+def openTextStream(filePath: str):
+    """
+    ファイルを読み込み用のテキストストリームとして開く
+    圧縮されている場合は読み込みながら展開する
+    """
+    compression = detectCompression(filePath)
+    if compression == "zlib":
+        f = gzip.open(filePath, mode="rt", encoding="utf-8")
+    elif compression == "lzma":
+        f = lzma.open(filePath, mode="rt", encoding="utf-8")
+    else:
+        f = open(filePath, mode="rt", encoding="utf-8")
+    with f:
+        yield f
+
+
+@contextmanager
+def atomicTextStream(filePath: str, compression: str = "None"):
+    """
+    書き込み用のテキストストリームを返す
+    compressionを指定した場合は書き込みながら圧縮する
+    書き込みはatomicWriteと同様に一時ファイルを経由する
+    """
+    if compression not in __MAGICNUMBERS:
+        with atomicWrite(filePath) as f:
+            yield f
+        return
+    with atomicWrite(filePath, mode="wb", encoding=None) as f:
+        if compression == "zlib":
+            compressed = gzip.GzipFile(
+                filename="", mode="wb", compresslevel=6, fileobj=f
+            )
+        else:
+            compressed = lzma.LZMAFile(f, mode="wb")
+        with io.TextIOWrapper(compressed, encoding="utf-8") as stream:
+            yield stream
+
+
 def openFile(filePath: str) -> str | None:
     try:
-        with open(filePath, mode="rt", encoding="utf-8") as f:
+        with openTextStream(filePath) as f:
             str_ = f.read()
-    except (FileNotFoundError, UnicodeDecodeError) as e:
-        errorType = type(e).__name__
-        errorMessage = str(e)
+    except (
+        FileNotFoundError,
+        UnicodeDecodeError,
+        EOFError,
+        gzip.BadGzipFile,
+        zlib.error,
+        lzma.LZMAError,
+    ) as e:
         logger.error(
-            f"An error of type {errorType} occurred while opening the file "
-            f"{filePath}: {errorMessage}"
+            "An error of type %s occurred while opening the file %s: %s",
+            type(e).__name__,
+            filePath,
+            e,
         )
         return None
     else:
-        logger.info(f"Open the file: {filePath}")
+        logger.info("Open the file: %s", filePath)
         return str_
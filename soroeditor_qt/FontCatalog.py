@@ -0,0 +1,66 @@
+from PySide6.QtGui import QFontDatabase, QGuiApplication
+
+# 利用できるフォントの一覧
+# 最初に必要になった時点で列挙し、フォントの構成が変わるまで使い回す
+__families: frozenset[str] | None = None
+__styles: dict[str, tuple[str, ...]] = {}
+__watching = False
+
+
+def families() -> frozenset[str]:
+    """
+    利用できるフォントファミリーの集合を返す
+    """
+    global __families
+    if __families is None:
+        watch()
+        __families = frozenset(
+            QFontDatabase.families(QFontDatabase.WritingSystem.Any)
+        )
+    return __families
+
+
+def styles(family: str) -> tuple[str, ...]:
+    """
+    フォントファミリーのスタイル名を返す
+    スタイル名はファミリーごとに最初に必要になった時点で取得する
+    """
+    if family not in __styles:
+        watch()
+        __styles[family] = tuple(QFontDatabase.styles(family))
+    return __styles[family]
+
+
+def hasFamily(family) -> bool:
+    return isinstance(family, str) and family in families()
+
+
+def hasStyle(family, style) -> bool:
+    return (
+        isinstance(family, str)
+        and isinstance(style, str)
+        and style in styles(family)
+    )
+
+
+def invalidate():
+    """
+    フォントの一覧を破棄し、次に必要になった時点で列挙し直す
+    """
+    global __families
+    __families = None
+    __styles.clear()
+
+
+def watch():
+    """
+    フォントの追加や削除の際に一覧を破棄する
+    """
+    global __watching
+    if __watching:
+        return
+    app = QGuiApplication.instance()
+    if app is None:
+        return
+    app.fontDatabaseChanged.connect(invalidate)
+    __watching = True
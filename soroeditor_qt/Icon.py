@@ -1,54 +1,135 @@
 from pathlib import Path
 
 from darkdetect import isDark
-from PySide6.QtGui import QPixmap
+from PySide6.QtCore import QSize, Qt
+from PySide6.QtGui import QGuiApplication, QImageReader, QPixmap
+
+DIRECTORY = Path(__file__).parent / "src" / "icon"
+
+THEMEDICONS = frozenset(
+    [
+        "Balance",
+        "Bookmark",
+        "Close",
+        "Copy",
+        "Cut",
+        "Export",
+        "FullScreen",
+        "Help",
+        "History",
+        "Import",
+        "Info",
+        "NewFile",
+        "OpenFile",
+        "Paste",
+        "Play",
+        "ProjectSetting",
+        "Refresh",
+        "Redo",
+        "Replace",
+        "SaveFile",
+        "SaveFileAs",
+        "Search",
+        "Select",
+        "SelectAll",
+        "Setting",
+        "Template",
+        "Undo",
+    ]
+)
+ICONS = THEMEDICONS | {"AppIcon"}
+
+# 読み込んだアイコンを(名前, テーマ, 大きさ)ごとに保持する
+__pixmaps: dict[tuple[str, str, int | None], QPixmap] = {}
+__theme: str | None = None
+__watching = False
+
+
+def theme() -> str:
+    """
+    アイコンのテーマ("light"または"dark")を返す
+    配色が変わるまでは最初に判定した結果を使う
+    """
+    global __theme
+    if __theme is None:
+        watch()
+        __theme = detectTheme()
+    return __theme
+
+
+def detectTheme() -> str:
+    app = QGuiApplication.instance()
+    if app is not None:
+        colorScheme = app.styleHints().colorScheme()
+        if colorScheme == Qt.ColorScheme.Dark:
+            return "dark"
+        if colorScheme == Qt.ColorScheme.Light:
+            return "light"
+    return "light" if not isDark() else "dark"
+
+
+def iconPath(name: str, iconTheme: str) -> Path:
+    if iconTheme:
+        return DIRECTORY / iconTheme / f"{name}.svg"
+    return DIRECTORY / f"{name}.svg"
+
+
+def pixmap(name: str, size: int | None = None) -> QPixmap:
+    """
+    アイコンを返す
+    最初に必要になった時点で読み込み、以降は同じものを返す
+    sizeを指定した場合はその大きさで描画する
+    """
+    if name not in ICONS:
+        raise KeyError(name)
+    iconTheme = theme() if name in THEMEDICONS else ""
+    key = (name, iconTheme, size)
+    if key not in __pixmaps:
+        reader = QImageReader(str(iconPath(name, iconTheme)))
+        if size is not None:
+            reader.setScaledSize(QSize(size, size))
+        __pixmaps[key] = QPixmap.fromImage(reader.read())
+    return __pixmaps[key]
+
+
+def invalidate():
+    """
+    テーマの判定と読み込んだアイコンを破棄する
+    """
+    global __theme
+    __theme = None
+    __pixmaps.clear()
+
+
+def watch():
+    """
+    配色が変わった際にテーマの判定と読み込んだアイコンを破棄する
+    """
+    global __watching
+    if __watching:
+        return
+    app = QGuiApplication.instance()
+    if app is None:
+        return
+    app.styleHints().colorSchemeChanged.connect(invalidate)
+    __watching = True
 
 
 class Icon:
-    def __init__(self):
-        super().__init__()
-        self.theme = "light" if not isDark() else "dark"
-        self.directory = Path(__file__).parent / "src" / "icon"
-
-        self.AppIcon = self._loadIcon("AppIcon.svg")
-        self._loadThemedIcons()
-
-    def _loadIcon(self, filename):
-        return QPixmap(self.directory / filename)
-
-    def _loadThemedIcon(self, name):
-        return self._loadIcon(self.directory / self.theme / f"{name}.svg")
-
-    def _loadThemedIcons(self):
-        themedIcons = [
-            "Balance",
-            "Bookmark",
-            "Close",
-            "Copy",
-            "Cut",
-            "Export",
-            "FullScreen",
-            "Help",
-            "History",
-            "Import",
-            "Info",
-            "NewFile",
-            "OpenFile",
-            "Paste",
-            "Play",
-            "ProjectSetting",
-            "Refresh",
-            "Redo",
-            "Replace",
-            "SaveFile",
-            "SaveFileAs",
-            "Search",
-            "Select",
-            "SelectAll",
-            "Setting",
-            "Template",
-            "Undo",
-        ]
-
-        for iconName in themedIcons:
-            setattr(self, iconName, self._loadThemedIcon(iconName))
+    """
+    アイコンを属性として参照する
+    Icon().NewFileはpixmap("NewFile")と同じものを返す
+    """
+
+    @property
+    def theme(self) -> str:
+        return theme()
+
+    @property
+    def directory(self) -> Path:
+        return DIRECTORY
+
+    def __getattr__(self, name: str) -> QPixmap:
+        if name not in ICONS:
+            raise AttributeError(name)
+        return pixmap(name)
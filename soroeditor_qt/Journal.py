@@ -0,0 +1,281 @@
+import json
+import os
+from functools import partial
+
+from PySide6.QtCore import QObject, QTimer, Slot
+
+from . import FileOperation
+from .logSetting import logSetting
+
+logger = logSetting(__name__)
+
+
+def journalPath(filePath: str) -> str:
+    return f"{filePath}.journal"
+
+
+def makeBase(savedTexts: list[str], texts: list[str]) -> list[list]:
+    """
+    保存済みのテキストから現在のテキストを作るための基点を返す
+    各ボックスについて[保存済みのテキストのうち残す文字数, 後ろに続くテキスト]
+    通常は末尾の改行のみが後ろに続くテキストになる
+    """
+    base = []
+    for saved, text in zip(savedTexts, texts):
+        keep = commonPrefixLength(saved, text)
+        base.append([keep, text[keep:]])
+    return base
+
+
+def commonPrefixLength(a: str, b: str) -> int:
+    if b.startswith(a):
+        return len(a)
+    # 先頭からの一致を二分探索する
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def replayJournal(data: dict, filePath: str) -> dict | None:
+    """
+    プロジェクトのデータに編集記録を適用したデータを返す
+    編集記録が無い、または読み込めない場合はNoneを返す
+    書き込み途中で終了した場合の不完全な行は無視する
+    """
+    path = journalPath(filePath)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, mode="rt", encoding="utf-8") as f:
+            # 記録には改行以外の行区切り(U+2028など)がそのまま含まれうる
+            lines = f.read().split("\n")
+    except (OSError, UnicodeDecodeError) as e:
+        logger.error("Failed to read the journal %s: %s", path, e)
+        return None
+
+    # 編集の位置と文字数はQtと同じくUTF-16の単位で数えるため、
+    # 本文はUTF-16のバイト列に変換して適用する
+    texts: list[bytes] = []
+    titles: list[str | None] = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            break
+        if "base" in record:
+            texts = [
+                toUtf16(data.get(i, {}).get("text", "")[:keep] + suffix)
+                for i, (keep, suffix) in enumerate(record["base"])
+            ]
+            titles = list(record["titles"])
+        elif not texts:
+            break
+        elif "title" in record:
+            titles[record["box"]] = record["title"]
+        else:
+            box = record["box"]
+            text = texts[box]
+            position = record["position"] * 2
+            end = position + record["removed"] * 2
+            texts[box] = text[:position] + toUtf16(record["text"]) + text[end:]
+    if not texts:
+        return None
+    return {
+        i: {"text": fromUtf16(text), "title": title}
+        for i, (text, title) in enumerate(zip(texts, titles))
+    }
+
+
+def toUtf16(text: str) -> bytes:
+    return text.encode("utf-16-le", "surrogatepass")
+
+
+def fromUtf16(text: bytes) -> str:
+    return text.decode("utf-16-le", "replace")
+
+
+class Journal(QObject):
+    """
+    保存されていない編集を<プロジェクトファイル>.journalに追記する編集記録
+
+    1行目に保存済みのプロジェクトからの基点を、以降の行に
+    QTextDocument.contentsChangeから得た編集とタイトルの変更をJSONで記録する
+    基点の文字数はPythonの文字単位で、編集の位置と文字数はQtと同じく
+    UTF-16の単位で数える
+    記録はまとめて一定時間ごとに追記し、最初の追記までファイルは作らない
+    保存が完了した時点で、保存した内容を基点とする記録に置き換える
+    """
+
+    def __init__(self, textEditor, interval: int = 1000):
+        super().__init__(textEditor)
+        self.textEditor = textEditor
+        self.path: str | None = None
+        # まだ書き込んでいない基点
+        self.base: dict | None = None
+        self.pending: list[dict] = []
+        # 保存中の内容ごとの、保存先と基点とそれ以降の記録
+        self.checkpoints: dict[int, tuple[str, dict, list[dict]]] = {}
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.flush)
+
+        for box, textEdit in enumerate(textEditor.textEdits):
+            textEdit.document().contentsChange.connect(
+                partial(self.contentsChange, box)
+            )
+        for box, lineEdit in enumerate(textEditor.lineEdits):
+            lineEdit.textChanged.connect(partial(self.titleChanged, box))
+
+    def makeBaseRecord(self, savedTexts: list[str]) -> dict:
+        texts = [
+            textEdit.toPlainText() for textEdit in self.textEditor.textEdits
+        ]
+        return {
+            "base": makeBase(savedTexts, texts),
+            "titles": self.textEditor.getAllCurrentTitle(),
+        }
+
+    def start(self, filePath: str, savedTexts: list[str]):
+        """
+        filePathに保存された内容を基点として記録を始める
+        既に編集記録のファイルがある場合、または読み込み中に編集されて
+        保存された内容と異なる場合は、現在の内容を基点としてすぐに書き込む
+        """
+        self.stop()
+        self.path = journalPath(filePath)
+        self.base = self.makeBaseRecord(savedTexts)
+        if os.path.exists(self.path) or self.textEditor.isModified():
+            self.writeAll([])
+
+    def stop(self):
+        """
+        未書き込みの記録を書き込んで記録を終える
+        """
+        self.flush()
+        self.path = None
+        self.base = None
+        self.checkpoints = {}
+
+    def discard(self):
+        """
+        記録を終え、編集記録のファイルを削除する
+        """
+        path = self.path
+        self.timer.stop()
+        self.pending = []
+        self.stop()
+        if path:
+            self.remove(path)
+
+    def remove(self, path: str):
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.error("Failed to remove the journal %s: %s", path, e)
+
+    def record(self, record: dict):
+        for _, _, records in self.checkpoints.values():
+            records.append(record)
+        if self.path is None:
+            return
+        self.pending.append(record)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    @Slot()
+    def flush(self):
+        self.timer.stop()
+        if self.path is None or not self.pending:
+            return
+        lines = [
+            json.dumps(record, ensure_ascii=False) for record in self.pending
+        ]
+        self.pending = []
+        try:
+            if self.base is not None:
+                self.writeAll(lines)
+                return
+            with open(self.path, mode="at", encoding="utf-8") as f:
+                f.write("".join(f"{line}\n" for line in lines))
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            logger.error("Failed to write the journal %s: %s", self.path, e)
+
+    def writeAll(self, lines: list[str]):
+        """
+        基点と記録をまとめて書き込み、編集記録のファイルを置き換える
+        """
+        lines = [json.dumps(self.base, ensure_ascii=False), *lines]
+        with FileOperation.atomicWrite(self.path) as f:
+            f.write("".join(f"{line}\n" for line in lines))
+        self.base = None
+
+    def beginCheckpoint(
+        self, revision: int, filePath: str, savedTexts: list[str]
+    ):
+        """
+        保存を始める際に呼び、保存する内容を基点とする記録を別に作り始める
+        """
+        self.checkpoints[revision] = (
+            journalPath(filePath),
+            self.makeBaseRecord(savedTexts),
+            [],
+        )
+
+    def commitCheckpoint(self, revision: int):
+        """
+        保存が完了した際に呼び、保存した内容を基点とする記録に置き換える
+        保存後に編集が無ければファイルを削除する
+        """
+        checkpoint = self.checkpoints.pop(revision, None)
+        if checkpoint is None:
+            return
+        path, base, records = checkpoint
+        for key in [key for key in self.checkpoints if key < revision]:
+            del self.checkpoints[key]
+        if self.path is not None and self.path != path:
+            # 別名で保存した場合、元のファイルの記録は保存先に引き継がれる
+            self.remove(self.path)
+        self.timer.stop()
+        self.pending = []
+        self.path = path
+        self.base = base
+        if records:
+            lines = [
+                json.dumps(record, ensure_ascii=False) for record in records
+            ]
+            try:
+                self.writeAll(lines)
+            except OSError as e:
+                logger.error("Failed to write the journal %s: %s", path, e)
+        else:
+            self.remove(path)
+
+    def cancelCheckpoint(self, revision: int):
+        self.checkpoints.pop(revision, None)
+
+    def contentsChange(
+        self, box: int, position: int, removed: int, added: int
+    ):
+        textEdit = self.textEditor.textEdits[box]
+        end = min(position + added, textEdit.document().characterCount() - 1)
+        self.record(
+            {
+                "box": box,
+                "position": position,
+                "removed": removed,
+                "text": textEdit.textBetween(position, end),
+            }
+        )
+
+    def titleChanged(self, box: int, title: str):
+        self.record({"box": box, "title": title})
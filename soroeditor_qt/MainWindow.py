@@ -1,72 +1,162 @@
+import importlib
 import os
 import sys
+from functools import partial
 from pathlib import Path
 
 from darkdetect import isDark
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import QCoreApplication, Qt, QThreadPool, QTimer, Slot
 from PySide6.QtGui import QAction, QCloseEvent, QGuiApplication, QKeySequence
-from PySide6.QtWidgets import QFileDialog, QLabel, QMainWindow, QMessageBox
-
-from . import DataOperation, SettingOperation
+from PySide6.QtWidgets import (
+    QApplication,
+    QFileDialog,
+    QLabel,
+    QMainWindow,
+    QMessageBox,
+    QProgressBar,
+    QSplashScreen,
+)
+
+from . import DataOperation, SettingOperation, StartupProfiler
 from .__version__ import __version__
-from .AboutWindow import AboutWindow
 from .Icon import Icon
+from .Journal import Journal, journalPath, replayJournal
 from .logSetting import logSetting
-from .SearchOperation import Match
-from .SearchWindow import SearchWindow
-from .SettingWindow import SettingWindow
+from .SaveWorker import SaveWorker
+from .SearchOperation import AhoCorasick, Match, MatchSet
 from .TextEditor import LineEdit, PlainTextEdit, TextEditor
-from .ThirdPartyNoticesWindow import ThirdPartyNoticesWindow
 
 logger = logSetting(__name__)
 
+# サブウィンドウの種類ごとの(保持する名前, モジュール, 引数)
+# クラスはモジュールと同じ名前で、モジュールは最初に開く際、
+# または起動後の空き時間に読み込む
+SUBWINDOWS = {
+    "AboutWindow": ("AboutWindow", "AboutWindow", []),
+    "SearchWindow": ("SearchWindow", "SearchWindow", ["search"]),
+    "ReplaceWindow": ("SearchWindow", "SearchWindow", ["replace"]),
+    "ProjectSettingWindow": (
+        "ProjectSettingWindow",
+        "SettingWindow",
+        ["Project"],
+    ),
+    "SettingWindow": ("SettingWindow", "SettingWindow", ["Default"]),
+    "ThirdPartyNoticesWindow": (
+        "ThirdPartyNoticesWindow",
+        "ThirdPartyNoticesWindow",
+        [],
+    ),
+}
+
+
+def loadSubWindowModule(moduleName: str):
+    return importlib.import_module(f".{moduleName}", __package__)
+
+
+def findWindow(
+    filePath: str, exclude: "MainWindow | None" = None
+) -> "MainWindow | None":
+    """
+    filePathを開いているウィンドウを返す
+    同じファイルを複数のウィンドウで開くと編集記録を互いに上書きするため、
+    開く前や別名で保存する前に確認する
+    """
+    key = os.path.normcase(os.path.abspath(filePath))
+    for widget in QApplication.topLevelWidgets():
+        if (
+            isinstance(widget, MainWindow)
+            and widget is not exclude
+            and widget.isVisible()
+            and widget.currentFilePath
+            and os.path.normcase(os.path.abspath(widget.currentFilePath))
+            == key
+        ):
+            return widget
+    return None
+
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(
+        self,
+        splash: QSplashScreen | None = None,
+        filePath: str | None = None,
+    ):
         super().__init__()
 
         # globalSettings: 設定ファイルに保存される設定
-        # projectSettings: プロジェクトファイルごとに保存される設定
-        settings = self.openSettingFile()
+        # projectSetting: プロジェクトファイルごとに保存される、ウィンドウごとの設定
+        with StartupProfiler.phase("openSettingFile"):
+            settings = self.openSettingFile()
         settings["Version"] = __version__
-        SettingOperation.setGlobalSettingData(settings)
-        SettingOperation.writeSettingFile(SettingOperation.globalSettingData())
-        SettingOperation.setProjectSettingData(
-            SettingOperation.globalSettingData()
-        )
+        with StartupProfiler.phase("settingVerification"):
+            SettingOperation.setGlobalSettingData(settings)
+            self.projectSetting = SettingOperation.ProjectSetting(
+                SettingOperation.globalSettingData()
+            )
 
         self.setWindowTitle("SoroEditor")
         self.setWindowIcon(Icon().AppIcon)
 
-        self.makeLayout()
+        with StartupProfiler.phase("makeLayout"):
+            self.makeLayout()
+        self.journal = Journal(self.textEditor)
 
-        self.currentFilePath = ""
-        self.latestData = self.makeSaveData()
+        # 読み込み中のみ表示する
+        self.progressBar = QProgressBar()
+        self.progressBar.setMaximumWidth(200)
+        self.statusBar().addPermanentWidget(self.progressBar)
+        self.statusBar().hide()
 
-        self.timer = QTimer(self)
-        self.timer.setInterval(100)
-        self.timer.timeout.connect(self.loop)
-        self.timer.start()
+        # 保存は専用のスレッドで順番に行う
+        self.saveThreadPool = QThreadPool(self)
+        self.saveThreadPool.setMaxThreadCount(1)
+        self.saveRevision = 0
+        self.runningSaves: dict[int, SaveWorker] = {}
+        # ボックスごとの(編集の番号, タイトル)と変換済みのYAMLの断片
+        self.fragmentCache: dict[int, tuple[tuple, str]] = {}
 
-        self.reflectionSettings("All")
-        self.show()
-
-        if len(sys.argv) >= 2:
-            projectFilePath = Path(sys.argv[-1]).absolute()
+        self.currentFilePath = ""
+        self.markAsSaved()
+        self.textEditor.modificationChanged.connect(self.updateWindowTitle)
+
+        with StartupProfiler.phase("reflectionSettings"):
+            self.reflectionSettings("All")
+        with StartupProfiler.phase("show"):
+            self.show()
+        if splash is not None:
+            splash.finish(self)
+
+        # ファイルの指定が無ければ起動時の引数のファイルを開く
+        if filePath is None and len(sys.argv) >= 2:
+            filePath = sys.argv[-1]
+        if filePath is not None:
+            projectFilePath = Path(filePath).absolute()
             if projectFilePath.exists():
-                self.openProjectFile(projectFilePath.as_posix())
+                with StartupProfiler.phase("openProjectFile"):
+                    self.openProjectFile(projectFilePath.as_posix())
+        else:
+            self.findLeftoverJournal()
+
+        # 最初の描画の後、サブウィンドウのモジュールを一つずつ読み込んでおく
+        self.warmUpModules = list(
+            dict.fromkeys(module for _, module, _ in SUBWINDOWS.values())
+        )
+        QTimer.singleShot(0, self.warmUpSubWindows)
 
     def makeLayout(self):
-        self.makeQActions()
-        self.makeTextEditor()
-        self.makeToolBar()
-        self.makeMenu()
+        with StartupProfiler.phase("makeQActions"):
+            self.makeQActions()
+        with StartupProfiler.phase("makeTextEditor"):
+            self.makeTextEditor()
+        with StartupProfiler.phase("makeToolBar"):
+            self.makeToolBar()
+        with StartupProfiler.phase("makeMenu"):
+            self.makeMenu()
         self.setCentralWidget(self.textEditor)
 
     def makeMenu(self):
         menuBar = self.menuBar()
-        global menu
-        menu = {
+        self.menu = {
             "fileMenu": menuBar.addMenu("ファイル(&F)"),
             "editMenu": menuBar.addMenu("編集(&E)"),
             "searchMenu": menuBar.addMenu("検索(&S)"),
@@ -76,27 +166,35 @@ class MainWindow(QMainWindow):
             "helpMenu": menuBar.addMenu("ヘルプ(&H)"),
         }
 
-        menu["fileMenu"].addActions(list(self.qAction["file"].values())[:-2])
-        menu["historyMenu"] = menu["fileMenu"].addMenu(
+        self.menu["fileMenu"].addActions(
+            list(self.qAction["file"].values())[:-2]
+        )
+        self.menu["historyMenu"] = self.menu["fileMenu"].addMenu(
             Icon().History, "ファイル履歴(&R)"
         )
         self.setFileHistoryMenu()
-        menu["fileMenu"].addSeparator()
-        menu["fileMenu"].addAction(list(self.qAction["file"].values())[-1])
+        self.menu["fileMenu"].addSeparator()
+        self.menu["fileMenu"].addAction(
+            list(self.qAction["file"].values())[-1]
+        )
 
-        menu["editMenu"].addActions(list(self.qAction["edit"].values()))
-        menu["searchMenu"].addActions(list(self.qAction["search"].values()))
-        menu["templateMenu"].addActions(
+        self.menu["editMenu"].addActions(list(self.qAction["edit"].values()))
+        self.menu["searchMenu"].addActions(
+            list(self.qAction["search"].values())
+        )
+        self.menu["templateMenu"].addActions(
             list(self.qAction["template"].values())
         )
-        menu["bookmarkMenu"].addActions(
+        self.menu["bookmarkMenu"].addActions(
             list(self.qAction["bookmark"].values())
         )
-        menu["settingMenu"].addActions(list(self.qAction["setting"].values()))
-        menu["helpMenu"].addActions(list(self.qAction["help"].values()))
+        self.menu["settingMenu"].addActions(
+            list(self.qAction["setting"].values())
+        )
+        self.menu["helpMenu"].addActions(list(self.qAction["help"].values()))
 
     def makeToolBar(self):
-        toolBarSettings = SettingOperation.projectSettingData()["ToolBar"]
+        toolBarSettings = self.projectSetting.data()["ToolBar"]
         toolButtonsElements = {
             "NewFile": {"actions": [self.qAction["file"]["NewFile"]]},
             "OpenFile": {"actions": [self.qAction["file"]["OpenFile"]]},
@@ -179,7 +277,7 @@ class MainWindow(QMainWindow):
             title = str(toolBarSetting["Title"])
 
             contents = toolBarSetting["Contents"]
-            if type(contents) is not list:
+            if not isinstance(contents, (list, tuple)):
                 contents = []
 
             self.addToolBarBreak(area)
@@ -422,54 +520,145 @@ QToolButton:hover:!pressed {{ background-color: {colorName} }}"""
         self.textEditor = TextEditor(self)
         self.reflectionSettings("Font")
 
-    def makeSaveData(self):
-        texts = self.textEditor.getAllCurrentText()
-        titles = self.textEditor.getAllCurrentTitle()
-        return DataOperation.makeSaveData(texts, titles)
+    def markAsSaved(self):
+        """
+        現在の状態を保存済みとして記録する
+        """
+        self.latestSettingRevision = self.projectSetting.revision()
+        self.textEditor.setModified(False)
 
-    def saveFile(self) -> bool:
+    def saveFile(self, wait: bool = False) -> bool:
         if self.currentFilePath:
-            texts = self.textEditor.getAllCurrentText()
-            titles = self.textEditor.getAllCurrentTitle()
-            ret = DataOperation.saveProjectFile(
-                texts, titles, self.currentFilePath
-            )
-        else:
-            ret = self.saveFileAs()
-        if ret:
-            self.latestData = self.makeSaveData()
-        return ret
+            return self.startSave(self.currentFilePath, wait=wait)
+        return self.saveFileAs(wait)
 
-    def saveFileAs(self) -> bool:
+    def saveFileAs(self, wait: bool = False) -> bool:
         filePath = QFileDialog().getSaveFileName(
             self,
             "SoroEditor - 名前をつけて保存",
             os.path.join(os.path.curdir, "noname"),
-            "SoroEditor Project File(*.sepf *.sep)",
+            "SoroEditor Project File(*.sepf *.sep);;"
+            "SoroEditor Binary Project File(*.sepb)",
         )[0]
-        if filePath:
-            texts = self.textEditor.getAllCurrentText()
-            titles = self.textEditor.getAllCurrentTitle()
-            ret = DataOperation.saveProjectFile(texts, titles, filePath)
-        else:
-            ret = False
-        if ret:
-            self.currentFilePath = filePath
-            self.addFileHistory(filePath)
+        if filePath and not self.isOpenedElsewhere(filePath):
+            return self.startSave(filePath, saveAs=True, wait=wait)
+        return False
+
+    def isOpenedElsewhere(self, filePath: str) -> bool:
+        """
+        filePathを別のウィンドウで開いている場合は、
+        そのウィンドウを前面に出して知らせ、Trueを返す
+        """
+        window = findWindow(filePath, exclude=self)
+        if window is None:
+            return False
+        window.activateWindow()
+        window.raise_()
+        QMessageBox.information(
+            self,
+            "SoroEditor - Infomation",
+            f"ファイル: {filePath} は別のウィンドウで開かれています",
+        )
+        return True
+
+    def startSave(
+        self, filePath: str, saveAs: bool = False, wait: bool = False
+    ) -> bool:
+        """
+        現在の内容のスナップショットをファイルに保存する
+        waitがFalseの場合は保存用のスレッドで書き込み、開始できればTrueを返す
+        waitがTrueの場合は書き込みの完了を待ち、その結果を返す
+        保存済みの状態は書き込みが成功した時点で反映される
+        """
+        self.textEditor.finishLoading()
+        titles = self.textEditor.getAllCurrentTitle()
+        data = DataOperation.makeSaveData(
+            self.textEditor.getAllCurrentText(),
+            titles,
+            self.projectSetting.data(),
+        )
+        fragmentKeys = list(zip(self.textEditor.boxRevisions, titles))
+        fragments = {
+            i: fragment
+            for i, (key, fragment) in self.fragmentCache.items()
+            if key == fragmentKeys[i]
+        }
+        self.saveRevision += 1
+        worker = SaveWorker(
+            data,
+            filePath,
+            self.saveRevision,
+            self.textEditor.editRevision,
+            self.projectSetting.revision(),
+            saveAs,
+            fragments,
+            fragmentKeys,
+        )
+        worker.signals.finished.connect(self.saveFinished)
+        self.runningSaves[self.saveRevision] = worker
+        self.journal.beginCheckpoint(
+            self.saveRevision,
+            filePath,
+            [box.get("text", "") for box in data["data"].values()],
+        )
+        if wait:
+            self.waitForSaves()
+            worker.run()
+            return worker.result
+        self.saveThreadPool.start(worker)
+        return True
+
+    def waitForSaves(self):
+        """
+        実行中の保存が完了するまで待ち、その結果を反映する
+        """
+        if self.runningSaves:
+            self.saveThreadPool.waitForDone()
+            QCoreApplication.sendPostedEvents()
+
+    @Slot(int)
+    def saveFinished(self, revision: int):
+        worker = self.runningSaves.pop(revision)
+        for i, fragment in worker.fragments.items():
+            self.fragmentCache[i] = (worker.fragmentKeys[i], fragment)
+        if not worker.result:
+            self.journal.cancelCheckpoint(revision)
+            QMessageBox.information(
+                self,
+                "SoroEditor - Infomation",
+                f"ファイル: {worker.filePath} の保存に失敗しました",
+            )
+            return
+        self.journal.commitCheckpoint(revision)
+        if worker.saveAs:
+            self.currentFilePath = worker.filePath
+            self.addFileHistory(worker.filePath)
             self.setFileHistoryMenu()
-            self.latestData = self.makeSaveData()
-            self.setWindowTitle(f"SoroEditor - {filePath}")
-        return ret
+        # スナップショットの作成後に編集されていれば変更済みのままにする
+        self.latestSettingRevision = worker.settingRevision
+        if worker.editRevision == self.textEditor.editRevision:
+            self.textEditor.setModified(False)
+        self.updateWindowTitle()
 
     def isDataChanged(self) -> bool:
-        return self.latestData != self.makeSaveData()
+        return (
+            self.textEditor.isModified()
+            or self.latestSettingRevision != self.projectSetting.revision()
+        )
 
-    def openProjectFile(self, filePath: str = ""):
+    def openProjectFile(self, filePath: str = "", recover: bool | None = None):
+        """
+        プロジェクトファイルを開く
+        編集記録が残っている場合、recoverがNoneであれば復元するか確認する
+        """
+        self.waitForSaves()
+        if filePath and self.isOpenedElsewhere(filePath):
+            return False
         if self.isDataChanged():
             messageBox = self.dataChangedAlert()
             ret = messageBox.exec()
             if ret == QMessageBox.StandardButton.Save:
-                ret = self.saveFile()
+                ret = self.saveFile(wait=True)
                 if not ret:
                     return False
             elif ret == QMessageBox.StandardButton.Discard:
@@ -483,23 +672,40 @@ QToolButton:hover:!pressed {{ background-color: {colorName} }}"""
                 self,
                 "SoroEditor - 開く",
                 os.path.curdir,
-                "SoroEditor Project File(*.sepf *.sep);;その他(*.*)",
+                "SoroEditor Project File(*.sepf *.sep *.sepb);;その他(*.*)",
             )[0]
+            if filePath and self.isOpenedElsewhere(filePath):
+                return False
         if filePath:
             data = DataOperation.openProjectFile(filePath)
             if data:
-                self.textEditor.setTextInTextBoxes(data["data"])
+                self.journal.discard()
+                recovered = self.recoverFromJournal(
+                    filePath, data["data"], recover
+                )
+                loader = self.textEditor.loadTextInTextBoxes(
+                    recovered or data["data"]
+                )
+                loader.progressChanged.connect(self.loadingProgressChanged)
+                loader.finished.connect(
+                    partial(
+                        self.projectLoaded,
+                        filePath,
+                        [box.get("text", "") for box in data["data"].values()],
+                    )
+                )
+                loader.start()
                 self.currentFilePath = filePath
                 self.addFileHistory(filePath)
                 self.setFileHistoryMenu()
 
                 data["settings"]["Version"] = __version__
-                SettingOperation.setProjectSettingData(
-                    SettingOperation.settingVerification(data["settings"])
-                )
+                self.projectSetting.setData(data["settings"])
                 self.reflectionSettings("All")
 
-                self.latestData = self.makeSaveData()
+                self.markAsSaved()
+                if recovered:
+                    self.textEditor.setModified(True)
                 return True
             else:
                 QMessageBox.information(
@@ -510,14 +716,95 @@ QToolButton:hover:!pressed {{ background-color: {colorName} }}"""
                 return False
         return False
 
+    @Slot(int, int)
+    def loadingProgressChanged(self, loaded: int, total: int):
+        if loaded < total:
+            self.progressBar.setRange(0, total)
+            self.progressBar.setValue(loaded)
+            self.statusBar().show()
+
+    def projectLoaded(self, filePath: str, savedTexts: list[str]):
+        """
+        プロジェクトの文章をすべて読み込んだ後に編集の記録を始める
+        """
+        self.statusBar().hide()
+        self.journal.start(filePath, savedTexts)
+
+    def recoverFromJournal(
+        self, filePath: str, data: dict, recover: bool | None = None
+    ) -> dict | None:
+        """
+        編集記録を適用したデータを返す
+        保存されていない変更が無い場合、または復元しない場合はNoneを返す
+        """
+        recovered = replayJournal(data, filePath)
+        if recovered is None:
+            return None
+        # 編集記録はスクロール用の改行も含めて編集中の文章を再現するが、
+        # 保存時には末尾の改行を取り除くため、取り除いてから比較する
+        if all(
+            recovered[i]["text"].rstrip("\r\n") == data[i].get("text", "")
+            and recovered[i]["title"] == data[i].get("title")
+            for i in data
+            if i in recovered
+        ):
+            return None
+        if recover is None:
+            ret = QMessageBox.question(
+                self,
+                "SoroEditor - 復元",
+                f"ファイル: {filePath} に保存されていない変更が残っています\n"
+                "復元しますか",
+            )
+            recover = ret == QMessageBox.StandardButton.Yes
+        return recovered if recover else None
+
+    def findLeftoverJournal(self):
+        """
+        ファイル履歴のプロジェクトに編集記録が残っていれば、開いて復元するか確認する
+        """
+        for filePath in SettingOperation.globalSettingData()["FileHistory"]:
+            if os.path.exists(journalPath(filePath)) and os.path.exists(
+                filePath
+            ):
+                break
+        else:
+            return
+        messageBox = QMessageBox(self)
+        messageBox.setIcon(QMessageBox.Icon.Question)
+        messageBox.setWindowTitle("SoroEditor - 復元")
+        messageBox.setText(
+            f"前回終了時に保存されていない変更が残っています\n{filePath}\n"
+            "開いて復元しますか"
+        )
+        messageBox.setStandardButtons(
+            QMessageBox.StandardButton.Yes
+            | QMessageBox.StandardButton.Discard
+            | QMessageBox.StandardButton.Cancel
+        )
+        messageBox.setButtonText(QMessageBox.StandardButton.Yes, "復元(&Y)")
+        messageBox.setButtonText(
+            QMessageBox.StandardButton.Discard, "破棄(&N)"
+        )
+        messageBox.setButtonText(
+            QMessageBox.StandardButton.Cancel, "キャンセル(&C)"
+        )
+        messageBox.setDefaultButton(QMessageBox.StandardButton.Yes)
+        ret = messageBox.exec()
+        if ret == QMessageBox.StandardButton.Yes:
+            self.openProjectFile(filePath, recover=True)
+        elif ret == QMessageBox.StandardButton.Discard:
+            self.journal.remove(journalPath(filePath))
+
     def openProjectFileFromHistory(self, filePath: str = ""):
         def inner():
             ret = self.openProjectFile(filePath)
             if not ret:
-                settings = SettingOperation.openSettingFile()
+                settings = SettingOperation.thaw(
+                    SettingOperation.globalSettingData()
+                )
                 fileHistory = settings["FileHistory"]
                 fileHistory.remove(filePath)
-                SettingOperation.writeSettingFile(settings)
                 SettingOperation.setGlobalSettingData(settings)
                 self.setFileHistoryMenu()
             return ret
@@ -525,9 +812,9 @@ QToolButton:hover:!pressed {{ background-color: {colorName} }}"""
         return inner
 
     def setFileHistoryMenu(self):
-        for action in menu["historyMenu"].actions():
-            menu["historyMenu"].removeAction(action)
-        menu["historyMenu"].addActions(
+        for action in self.menu["historyMenu"].actions():
+            self.menu["historyMenu"].removeAction(action)
+        self.menu["historyMenu"].addActions(
             [
                 QAction(
                     text=f"&{i+1 if i < 9 else 0}: {filePath}",
@@ -544,8 +831,8 @@ QToolButton:hover:!pressed {{ background-color: {colorName} }}"""
                 )
             ]
         )
-        menu["historyMenu"].addSeparator()
-        menu["historyMenu"].addAction(
+        self.menu["historyMenu"].addSeparator()
+        self.menu["historyMenu"].addAction(
             QAction(
                 text="履歴ウィンドウ(&R)",
                 parent=self,
@@ -555,13 +842,12 @@ QToolButton:hover:!pressed {{ background-color: {colorName} }}"""
         )
 
     def addFileHistory(self, filePath: str):
-        settings = SettingOperation.openSettingFile()
+        settings = SettingOperation.thaw(SettingOperation.globalSettingData())
         fileHistory = settings["FileHistory"]
         fileHistory.insert(0, filePath)
         fileHistory = list(dict.fromkeys(fileHistory))
         settings["FileHistory"] = fileHistory
         SettingOperation.setGlobalSettingData(settings)
-        SettingOperation.writeSettingFile(settings)
 
     def dataChangedAlert(self) -> QMessageBox:
         messageBox = QMessageBox(self)
@@ -623,20 +909,20 @@ QToolButton:hover:!pressed {{ background-color: {colorName} }}"""
         else:
             return
 
-    def search(self, pattern, regex):
-        return [
-            textEdit.search(pattern, regex)
-            for textEdit in self.textEditor.textEdits
-        ]
+    def search(self, pattern, regex, box: int, wait: bool = False):
+        return self.textEditor.textEdits[box].search(pattern, regex, wait)
+
+    def searchTerms(self, termSearch: AhoCorasick, box: int):
+        return self.textEditor.textEdits[box].searchTerms(termSearch)
 
     def replace(self, match: Match, repl: str):
         textEdit = self.textEditor.textEdits[match.box]
         textEdit.replace(match, repl)
 
-    def replaceAll(self, matches: list[Match], repl: str, box: int):
-        self.textEditor.textEdits[box].replaceAll(matches, repl)
+    def replaceAll(self, matches: MatchSet, repl: str, box: int) -> int:
+        return self.textEditor.textEdits[box].replaceAll(matches, repl)
 
-    def highlightMatches(self, matches: list[Match], box: int):
+    def highlightMatches(self, matches: MatchSet, box: int):
         self.textEditor.textEdits[box].highlightMatches(matches)
 
     def focus(self, match: Match):
@@ -646,7 +932,7 @@ QToolButton:hover:!pressed {{ background-color: {colorName} }}"""
             textEdit.setTextCursor(cursor)
         self.textEditor.textEdits[match.box].focus(match)
 
-    def loop(self):
+    def updateWindowTitle(self):
         title = "SoroEditor - "
         if self.currentFilePath:
             title += self.currentFilePath
@@ -690,13 +976,14 @@ QToolButton:hover:!pressed {{ background-color: {colorName} }}"""
                 settingFunctions = [settingFunctions]
             for function in settingFunctions:
                 function()
+            self.updateWindowTitle()
 
     def reflectSize(self):
-        size = SettingOperation.projectSettingData().get("Size")
+        size = self.projectSetting.data().get("Size")
         ratio = QGuiApplication.primaryScreen().devicePixelRatio()
         screenSize = QGuiApplication.primaryScreen().size().toTuple()
         if size:
-            if type(size) is list:
+            if isinstance(size, (list, tuple)):
                 self.resize(*[int(lengh / ratio) for lengh in size])
             else:
                 self.resize(
@@ -711,15 +998,15 @@ QToolButton:hover:!pressed {{ background-color: {colorName} }}"""
                 self.moveWindowToCenter()
 
     def reflectResizable(self):
-        resizable = SettingOperation.projectSettingData().get("Resizable")
+        resizable = self.projectSetting.data().get("Resizable")
         if resizable:
             self.setFixedSize(0xFFFFFF, 0xFFFFFF)
         else:
             self.setFixedSize(self.size())
 
     def reflectFontFamily(self):
-        fontFamily = SettingOperation.projectSettingData().get("Font")
-        fontStyle = SettingOperation.projectSettingData().get("FontStyle")
+        fontFamily = self.projectSetting.data().get("Font")
+        fontStyle = self.projectSetting.data().get("FontStyle")
         if fontFamily:
             font = self.textEditor.font()
             font.setFamily(fontFamily)
@@ -727,7 +1014,7 @@ QToolButton:hover:!pressed {{ background-color: {colorName} }}"""
             self.textEditor.setFont(font)
 
     def reflectFontSize(self):
-        fontSize = SettingOperation.projectSettingData().get("FontSize")
+        fontSize = self.projectSetting.data().get("FontSize")
         if fontSize:
             font = self.textEditor.font()
             font.setPointSize(fontSize)
@@ -741,7 +1028,7 @@ QToolButton:hover:!pressed {{ background-color: {colorName} }}"""
     def toggleFullScreenMode(self):
         if self.isFullScreen():
             self.showNormal()
-            if SettingOperation.projectSettingData()["Size"] == "FullScreen":
+            if self.projectSetting.data()["Size"] == "FullScreen":
                 self.resize(*SettingOperation.defaultSettingData()["Size"])
                 self.moveWindowToCenter()
             else:
@@ -758,19 +1045,32 @@ QToolButton:hover:!pressed {{ background-color: {colorName} }}"""
         self.move(x, y)
 
     def closeEvent(self, event: QCloseEvent) -> None:
+        self.waitForSaves()
         if self.isDataChanged():
             messageBox = self.dataChangedAlert()
             ret = messageBox.exec()
             if ret == QMessageBox.StandardButton.Save:
-                ret = self.saveFile()
+                ret = self.saveFile(wait=True)
                 if not ret:
                     return event.ignore()
             elif ret == QMessageBox.StandardButton.Discard:
                 pass
             elif ret == QMessageBox.StandardButton.Cancel:
                 return event.ignore()
+        self.textEditor.cancelLoading()
+        self.journal.discard()
+        SettingOperation.flushSettingFile()
         return super().closeEvent(event)
 
+    @Slot()
+    def warmUpSubWindows(self):
+        if not self.warmUpModules:
+            return
+        moduleName = self.warmUpModules.pop(0)
+        with StartupProfiler.phase(f"import {moduleName}"):
+            loadSubWindowModule(moduleName)
+        QTimer.singleShot(0, self.warmUpSubWindows)
+
     def openSubWindow(self, type_: str):
         self.subWindows = {
             "AboutWindow": None,
@@ -780,41 +1080,21 @@ QToolButton:hover:!pressed {{ background-color: {colorName} }}"""
             "ThirdPartyNoticesWindow": None,
         }
 
-        subWindow: type[
-            AboutWindow
-            | SearchWindow
-            | SettingWindow
-            | ThirdPartyNoticesWindow
-        ]
-        mode = []
-        if type_ == "AboutWindow":
-            subWindow = AboutWindow
-        elif type_ == "SearchWindow":
-            subWindow = SearchWindow
-            mode = ["search"]
-        elif type_ == "ReplaceWindow":
-            type_ = "SearchWindow"
-            subWindow = SearchWindow
-            mode = ["replace"]
-        elif type_ == "ProjectSettingWindow":
-            subWindow = SettingWindow
-            mode = ["Project"]
-        elif type_ == "SettingWindow":
-            subWindow = SettingWindow
-            mode = ["Default"]
-        elif type_ == "ThirdPartyNoticesWindow":
-            subWindow = ThirdPartyNoticesWindow
-        else:
+        if type_ not in SUBWINDOWS:
             return
+        key, moduleName, mode = SUBWINDOWS[type_]
 
         def inner():
-            if self.subWindows[type_] is None:
-                self.subWindows[type_] = subWindow(self, *mode)
-                self.subWindows[type_].show()
+            if self.subWindows[key] is None:
+                subWindow = getattr(
+                    loadSubWindowModule(moduleName), moduleName
+                )
+                self.subWindows[key] = subWindow(self, *mode)
+                self.subWindows[key].show()
             else:
-                if self.subWindows[type_].isHidden():
-                    self.subWindows[type_].show()
-                self.subWindows[type_].activateWindow()
-                self.subWindows[type_].raise_()
+                if self.subWindows[key].isHidden():
+                    self.subWindows[key].show()
+                self.subWindows[key].activateWindow()
+                self.subWindows[key].raise_()
 
         return inner
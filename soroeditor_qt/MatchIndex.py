@@ -0,0 +1,259 @@
+import re
+from collections.abc import Sequence
+
+from PySide6.QtCore import QObject, QThreadPool, Signal, Slot
+from PySide6.QtGui import QTextDocument
+
+from .SearchOperation import (
+    FenwickTree,
+    compilePattern,
+    findSpans,
+    isBlockLocal,
+)
+from .SearchWorker import SearchWorker
+
+
+class MatchIndex(QObject):
+    """
+    QTextDocumentの一致箇所を段落(ブロック)ごとに保持する索引
+
+    検索中はcontentsChangeを受けて変更のあった段落のみを再検索する
+    各段落の一致箇所は段落内の相対位置を並べた配列で保持し、絶対位置は参照時に
+    QTextBlock.positionから求める
+    一致件数の累積はFenwick木で管理し、段落数が変わった場合のみ
+    次回の参照時に作り直す
+
+    一致箇所は段落をまたがない
+    ただし段落ごとに検索すると結果が変わりうる検索条件(改行を含む文字列、
+    改行や文字列の端に一致しうる正規表現など)の場合は、
+    文書全体を一つの段落として扱う
+
+    検索条件の変更による文書全体の検索は、文書のスナップショットに対して
+    スレッドプール上で行い、完了時にmatchesChangedを送出する
+    検索中に条件や文書が変更された場合は実行中の検索を中断する
+    """
+
+    matchesChanged = Signal()
+
+    def __init__(self, document: QTextDocument):
+        super().__init__(document)
+        self.document = document
+        self.pattern = ""
+        self.regex = False
+        self.compiledPattern: str | re.Pattern | None = None
+        self.wholeDocument = False
+        self.blockMatches: list = []
+        self.counts: FenwickTree | None = None
+        self.worker: SearchWorker | None = None
+        # 中断したものも含め、完了するまでワーカーへの参照を保持する
+        self.runningWorkers: dict[int, SearchWorker] = {}
+        self.generation = 0
+        document.contentsChange.connect(self.contentsChange)
+
+    def isActive(self) -> bool:
+        return self.compiledPattern is not None
+
+    def isReady(self) -> bool:
+        """
+        文書全体の検索が完了していればTrueを返す
+        """
+        return self.worker is None
+
+    def setPattern(self, pattern: str, regex: bool):
+        """
+        検索条件を設定する
+        条件が変わった場合のみ文書全体を検索し直す
+        """
+        if (pattern, regex) == (self.pattern, self.regex):
+            return
+        self.pattern = pattern
+        self.regex = regex
+        self.compiledPattern = None
+        if pattern:
+            if regex:
+                compiledPattern = compilePattern(pattern)
+                if isinstance(compiledPattern, re.Pattern):
+                    self.compiledPattern = compiledPattern
+            else:
+                self.compiledPattern = pattern
+        self.wholeDocument = not isBlockLocal(pattern, regex)
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        文書全体の検索をバックグラウンドで開始する
+        """
+        self.cancel()
+        self.counts = None
+        self.blockMatches = []
+        if not self.isActive():
+            return
+
+        if self.wholeDocument:
+            texts = [self.document.toPlainText()]
+        else:
+            texts = self.document.toRawText().split("\u2029")
+        self.generation += 1
+        self.worker = SearchWorker(
+            texts, self.compiledPattern, self.generation
+        )
+        self.worker.signals.finished.connect(self.workerFinished)
+        self.runningWorkers[self.generation] = self.worker
+        QThreadPool.globalInstance().start(self.worker)
+
+    def cancel(self):
+        if self.worker is not None:
+            self.worker.token.cancel()
+            self.worker = None
+
+    def waitForReady(self):
+        """
+        バックグラウンドでの検索を中断し、同じスナップショットをこのスレッドで検索する
+        """
+        if self.worker is None:
+            return
+        texts = self.worker.texts
+        self.cancel()
+        self.blockMatches = [
+            findSpans(text, self.compiledPattern) for text in texts
+        ]
+
+    @Slot(int, object)
+    def workerFinished(self, generation: int, blockMatches: list | None):
+        self.runningWorkers.pop(generation, None)
+        if (
+            blockMatches is None
+            or self.worker is None
+            or generation != self.worker.generation
+        ):
+            return
+        self.worker = None
+        self.blockMatches = blockMatches
+        self.counts = None
+        self.matchesChanged.emit()
+
+    @Slot(int, int, int)
+    def contentsChange(self, position: int, removed: int, added: int):
+        if not self.isActive():
+            return
+        if self.wholeDocument or not self.isReady():
+            # 検索中のスナップショットは古くなるため検索し直す
+            self.rebuild()
+            return
+
+        document = self.document
+        first = document.findBlock(position)
+        last = document.findBlock(position + added)
+        if not last.isValid():
+            last = document.lastBlock()
+        firstNumber = first.blockNumber()
+        lastNumber = last.blockNumber()
+        delta = document.blockCount() - len(self.blockMatches)
+        oldLastNumber = lastNumber - delta
+        if (
+            firstNumber < 0
+            or oldLastNumber < firstNumber - 1
+            or oldLastNumber >= len(self.blockMatches)
+        ):
+            self.rebuild()
+            return
+
+        spansList = []
+        block = first
+        while True:
+            spansList.append(findSpans(block.text(), self.compiledPattern))
+            if block == last:
+                break
+            block = block.next()
+
+        if delta == 0 and self.counts is not None:
+            for number, spans in enumerate(spansList, firstNumber):
+                diff = (len(spans) - len(self.blockMatches[number])) // 2
+                if diff:
+                    self.counts.add(number, diff)
+        else:
+            self.counts = None
+        oldEndNumber = oldLastNumber + 1
+        self.blockMatches[firstNumber:oldEndNumber] = spansList
+
+    def _counts(self) -> FenwickTree:
+        if self.counts is None:
+            self.counts = FenwickTree(
+                len(spans) // 2 for spans in self.blockMatches
+            )
+        return self.counts
+
+    def _blockPosition(self, number: int) -> int:
+        if self.wholeDocument:
+            return 0
+        return self.document.findBlockByNumber(number).position()
+
+    def count(self) -> int:
+        """
+        一致箇所の総数を返す
+        """
+        if not self.isActive():
+            return 0
+        return self._counts().total()
+
+    def span(self, k: int) -> tuple[int, int]:
+        """
+        k番目の一致箇所の絶対位置を返す
+        """
+        counts = self._counts()
+        number = counts.find(k)
+        index = (k - counts.prefixSum(number)) * 2
+        spans = self.blockMatches[number]
+        position = self._blockPosition(number)
+        return position + spans[index], position + spans[index + 1]
+
+    def iterSpans(self):
+        """
+        すべての一致箇所の絶対位置を先頭から順に返す
+        """
+        if not self.isActive():
+            return
+        for number, spans in enumerate(self.blockMatches):
+            if not spans:
+                continue
+            position = self._blockPosition(number)
+            for index in range(0, len(spans), 2):
+                yield position + spans[index], position + spans[index + 1]
+
+    def positions(self) -> tuple["MatchPositions", "MatchPositions"]:
+        """
+        すべての一致箇所の開始位置と終了位置の列を返す
+        列は参照のたびに索引から位置を求め、配列を作らない
+        """
+        return MatchPositions(self, 0), MatchPositions(self, 1)
+
+
+class MatchPositions(Sequence):
+    """
+    索引の一致箇所の開始位置(side=0)または終了位置(side=1)の列
+    k番目の位置はFenwick木と段落の位置からO(log n)で求めるため、
+    常に文書の現在の位置を返す
+    """
+
+    __slots__ = ("index", "side")
+
+    def __init__(self, index: MatchIndex, side: int):
+        self.index = index
+        self.side = side
+
+    def __len__(self) -> int:
+        return self.index.count()
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self[i] for i in range(*k.indices(len(self)))]
+        length = len(self)
+        if k < 0:
+            k += length
+        if not 0 <= k < length:
+            raise IndexError(k)
+        return self.index.span(k)[self.side]
+
+    def __iter__(self):
+        for span in self.index.iterSpans():
+            yield span[self.side]
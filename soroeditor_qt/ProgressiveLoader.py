@@ -0,0 +1,165 @@
+from functools import partial
+from time import perf_counter
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from PySide6.QtGui import QTextCursor
+
+
+class ProgressiveLoader(QObject):
+    """
+    テキストボックスに文章を少しずつ読み込む
+
+    最初に各ボックスへ画面に表示される程度の先頭部分を設定し、残りは
+    イベントループの合間に一定時間ずつ、段落の区切りで分けて追加する
+    読み込み中も編集でき、読み込み位置は編集に合わせて移動する
+    追加した部分は変更として扱わず、読み込みが終わるまで取り消しの履歴は無効になる
+    """
+
+    progressChanged = Signal(int, int)
+    finished = Signal()
+
+    def __init__(
+        self,
+        textEditor,
+        dic: dict,
+        firstChunkSize: int = 4000,
+        chunkSize: int = 65536,
+        timeSlice: float = 0.016,
+    ):
+        super().__init__(textEditor)
+        self.textEditor = textEditor
+        self.firstChunkSize = firstChunkSize
+        self.chunkSize = chunkSize
+        self.timeSlice = timeSlice
+        self.texts: dict[int, str] = {}
+        self.titles: dict[int, str] = {}
+        for i in range(len(textEditor.textEdits)):
+            if i in dic:
+                self.texts[i] = dic[i]["text"]
+                self.titles[i] = dic[i]["title"]
+        # 各ボックスの読み込み済みの文字数と、次に追加する文書上の位置
+        self.offsets = {i: 0 for i in self.texts}
+        self.positions = {i: 0 for i in self.texts}
+        self.total = sum(len(text) for text in self.texts.values())
+        self.inserting = False
+        self.connections = []
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.loadNext)
+
+    def isLoading(self) -> bool:
+        return self.timer.isActive()
+
+    def loaded(self) -> int:
+        return sum(self.offsets.values())
+
+    def start(self):
+        for i, text in self.texts.items():
+            textEdit = self.textEditor.textEdits[i]
+            document = textEdit.document()
+            end = self.chunkEnd(text, 0, self.firstChunkSize)
+            textEdit.setPlainText(text[:end])
+            document.setUndoRedoEnabled(False)
+            self.offsets[i] = end
+            self.positions[i] = document.characterCount() - 1
+            self.textEditor.lineEdits[i].setText(self.titles[i])
+            self.connections.append(
+                document.contentsChange.connect(
+                    partial(self.contentsChange, i)
+                )
+            )
+        self.textEditor.addReturn()
+        self.progressChanged.emit(self.loaded(), self.total)
+        if self.loaded() < self.total:
+            self.timer.start()
+        else:
+            self.done()
+
+    def chunkEnd(self, text: str, offset: int, size: int) -> int:
+        """
+        offsetからおよそsize文字の、段落の区切りの直後の位置を返す
+        """
+        end = offset + size
+        if end >= len(text):
+            return len(text)
+        newline = text.rfind("\n", offset, end)
+        return newline + 1 if newline != -1 else end
+
+    def contentsChange(
+        self, box: int, position: int, removed: int, added: int
+    ):
+        if self.inserting:
+            return
+        insertion = self.positions[box]
+        if position >= insertion:
+            return
+        if position + removed <= insertion:
+            self.positions[box] = insertion + added - removed
+        else:
+            self.positions[box] = position + added
+
+    def insertChunk(self, box: int):
+        text = self.texts[box]
+        offset = self.offsets[box]
+        end = self.chunkEnd(text, offset, self.chunkSize)
+        document = self.textEditor.textEdits[box].document()
+        modified = document.isModified()
+        cursor = QTextCursor(document)
+        cursor.setPosition(self.positions[box])
+        self.inserting = True
+        cursor.insertText(text[offset:end])
+        self.inserting = False
+        if not modified:
+            document.setModified(False)
+        self.offsets[box] = end
+        self.positions[box] = cursor.position()
+
+    def remainingBoxes(self) -> list[int]:
+        return [
+            i for i, text in self.texts.items() if self.offsets[i] < len(text)
+        ]
+
+    @Slot()
+    def loadNext(self):
+        deadline = perf_counter() + self.timeSlice
+        boxes = self.remainingBoxes()
+        while boxes and perf_counter() < deadline:
+            for box in boxes:
+                self.insertChunk(box)
+            boxes = self.remainingBoxes()
+        self.progressChanged.emit(self.loaded(), self.total)
+        if not boxes:
+            self.done()
+
+    def finish(self):
+        """
+        残りをすべて読み込む
+        """
+        if not self.isLoading():
+            return
+        for box in self.remainingBoxes():
+            while self.offsets[box] < len(self.texts[box]):
+                self.insertChunk(box)
+        self.progressChanged.emit(self.loaded(), self.total)
+        self.done()
+
+    def cancel(self):
+        """
+        読み込みを中断する
+        """
+        self.timer.stop()
+        self.release()
+
+    def release(self):
+        for connection in self.connections:
+            QObject.disconnect(connection)
+        self.connections = []
+        for i in self.texts:
+            self.textEditor.textEdits[i].document().setUndoRedoEnabled(True)
+
+    def done(self):
+        self.timer.stop()
+        self.release()
+        self.textEditor.addReturn()
+        self.finished.emit()
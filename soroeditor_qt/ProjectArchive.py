@@ -0,0 +1,181 @@
+"""
+索引付きのバイナリ形式のプロジェクトファイル(.sepb)
+
+ヘッダ: マジックナンバー b"SEPB", バージョン(u16), セクション数(u32)
+索引: セクションごとに 名前の長さ(u16), 名前(UTF-8),
+      開始位置(u64), 長さ(u64), 圧縮方式(u8)
+本文: 各セクションのバイト列
+
+セクションは"metadata"と"text/<ボックス番号>"からなる
+"metadata"はプロジェクトのデータから本文を除いたもの(タイトルと設定)をYAMLで、
+"text/<ボックス番号>"はボックスの本文をUTF-8で格納する
+圧縮方式は 0: なし, 1: zlib, 2: lzma
+数値はすべてリトルエンディアン
+"""
+
+import lzma
+import mmap
+import struct
+import zlib
+
+MAGIC = b"SEPB"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHI")
+NAMELENGTH = struct.Struct("<H")
+ENTRY = struct.Struct("<QQB")
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZMA = 2
+COMPRESSORS = {
+    "zlib": (COMPRESSION_ZLIB, zlib.compress),
+    "lzma": (COMPRESSION_LZMA, lzma.compress),
+}
+
+# これより小さいセクションは圧縮しない
+COMPRESSION_THRESHOLD = 4096
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+def textSectionName(box) -> str:
+    return f"text/{box}"
+
+
+def isArchive(filePath: str) -> bool:
+    """
+    ファイルがバイナリ形式のプロジェクトファイルであればTrueを返す
+    """
+    try:
+        with open(filePath, mode="rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def dumpArchive(
+    metadata: str, texts: dict, compression: str = "None"
+) -> bytes:
+    """
+    YAMLのメタデータとボックスごとの本文からバイナリ形式のデータを作る
+    compressionに"zlib"または"lzma"を指定した場合、
+    一定以上の大きさのセクションを圧縮する
+    """
+    sections = [("metadata", metadata.encode("utf-8"))]
+    for box, text in texts.items():
+        sections.append((textSectionName(box), text.encode("utf-8")))
+
+    entries = []
+    for name, body in sections:
+        method = COMPRESSION_NONE
+        if compression in COMPRESSORS and len(body) >= COMPRESSION_THRESHOLD:
+            compressedMethod, compress = COMPRESSORS[compression]
+            compressed = compress(body)
+            if len(compressed) < len(body):
+                body = compressed
+                method = compressedMethod
+        entries.append((name.encode("utf-8"), body, method))
+
+    indexSize = sum(
+        NAMELENGTH.size + len(name) + ENTRY.size for name, _, _ in entries
+    )
+    offset = HEADER.size + indexSize
+    chunks = [HEADER.pack(MAGIC, VERSION, len(entries))]
+    for name, body, method in entries:
+        chunks.append(NAMELENGTH.pack(len(name)))
+        chunks.append(name)
+        chunks.append(ENTRY.pack(offset, len(body), method))
+        offset += len(body)
+    chunks.extend(body for _, body, _ in entries)
+    return b"".join(chunks)
+
+
+class ProjectArchive:
+    """
+    バイナリ形式のプロジェクトファイルをmmapで開き、セクションごとに読み込む
+    索引のみを最初に読み込むため、本文を読まずにメタデータを取得できる
+    """
+
+    def __init__(self, filePath: str):
+        self.filePath = filePath
+        self.sections: dict[str, tuple[int, int, int]] = {}
+        with open(filePath, mode="rb") as f:
+            try:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                # 空のファイル
+                raise ArchiveError(f"Not a project archive: {e}")
+        try:
+            self.readIndex()
+        except (ArchiveError, struct.error, UnicodeDecodeError) as e:
+            self.close()
+            raise ArchiveError(f"Broken project archive: {e}")
+
+    def readIndex(self):
+        magic, version, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ArchiveError("Invalid magic number")
+        if version > VERSION:
+            raise ArchiveError(f"Unsupported version {version}")
+        position = HEADER.size
+        for _ in range(count):
+            (length,) = NAMELENGTH.unpack_from(self.map, position)
+            position += NAMELENGTH.size
+            nameEnd = position + length
+            name = self.map[position:nameEnd].decode("utf-8")
+            position = nameEnd
+            offset, size, compression = ENTRY.unpack_from(self.map, position)
+            position += ENTRY.size
+            if offset + size > len(self.map):
+                raise ArchiveError(f"Section {name} is out of range")
+            self.sections[name] = (offset, size, compression)
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def read(self, name: str) -> bytes:
+        """
+        セクションを展開して返す
+        """
+        if name not in self.sections:
+            raise ArchiveError(f"Section {name} not found")
+        offset, size, compression = self.sections[name]
+        end = offset + size
+        body = self.map[offset:end]
+        if compression == COMPRESSION_ZLIB:
+            try:
+                body = zlib.decompress(body)
+            except zlib.error as e:
+                raise ArchiveError(f"Failed to decompress {name}: {e}")
+        elif compression == COMPRESSION_LZMA:
+            try:
+                body = lzma.decompress(body)
+            except lzma.LZMAError as e:
+                raise ArchiveError(f"Failed to decompress {name}: {e}")
+        elif compression != COMPRESSION_NONE:
+            raise ArchiveError(f"Unknown compression {compression}")
+        return body
+
+    def metadata(self) -> str:
+        """
+        本文を除いたプロジェクトのデータをYAMLで返す
+        """
+        return self.read("metadata").decode("utf-8")
+
+    def hasText(self, box) -> bool:
+        return textSectionName(box) in self.sections
+
+    def text(self, box) -> str:
+        """
+        一つのボックスの本文を返す
+        """
+        return self.read(textSectionName(box)).decode("utf-8")
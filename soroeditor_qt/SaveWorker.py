@@ -0,0 +1,47 @@
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from . import DataOperation
+
+
+class SaveWorkerSignals(QObject):
+    finished = Signal(int)
+
+
+class SaveWorker(QRunnable):
+    """
+    プロジェクトのスナップショットを変換してファイルに書き込むワーカー
+    書き込みは一時ファイルを経由して行い、完了時に結果をresultに格納して
+    finishedを送出する
+    """
+
+    def __init__(
+        self,
+        data: dict,
+        filePath: str,
+        revision: int,
+        editRevision: int,
+        settingRevision: int,
+        saveAs: bool = False,
+        fragments: dict | None = None,
+        fragmentKeys: list | None = None,
+    ):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.data = data
+        self.filePath = filePath
+        self.revision = revision
+        self.editRevision = editRevision
+        self.settingRevision = settingRevision
+        self.saveAs = saveAs
+        # ボックスごとのYAMLの断片
+        # 変更の無いボックスは変換済みのものを受け取り、残りは保存時に追加される
+        self.fragments = {} if fragments is None else fragments
+        self.fragmentKeys = fragmentKeys
+        self.result = False
+        self.signals = SaveWorkerSignals()
+
+    def run(self):
+        self.result = DataOperation.writeProjectData(
+            self.data, self.filePath, self.fragments
+        )
+        self.signals.finished.emit(self.revision)
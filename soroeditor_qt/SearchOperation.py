@@ -1,9 +1,327 @@
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
 from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, Sequence
 
 
-@dataclass
+@dataclass(slots=True)
 class Match:
     start: int
     end: int
     group: str
     box: int
+
+
+class MatchSet:
+    """
+    1つのボックスの一致箇所を開始位置と終了位置の列で保持する
+    列は配列のほか、参照時に索引から位置を求めるものでもよい
+    一致した文字列は参照時にtextSourceから取得する
+    """
+
+    __slots__ = ("box", "starts", "ends", "textSource")
+
+    def __init__(
+        self,
+        box: int,
+        starts: Sequence[int] | None = None,
+        ends: Sequence[int] | None = None,
+        textSource: Callable[[int, int], str] | None = None,
+    ):
+        self.box = box
+        self.starts = starts if starts is not None else array("q")
+        self.ends = ends if ends is not None else array("q")
+        self.textSource = textSource
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> Match:
+        start = self.starts[index]
+        end = self.ends[index]
+        group = self.textSource(start, end) if self.textSource else ""
+        return Match(start, end, group, self.box)
+
+    def __iter__(self) -> Iterator[Match]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def spans(self) -> Iterator[tuple[int, int]]:
+        return zip(self.starts, self.ends)
+
+    def nextIndex(self, position: int, inclusive: bool = True) -> int:
+        """
+        positionより後ろにある最初の一致箇所の番号を返す
+        inclusiveがTrueの場合はposition上の一致箇所も含める
+        該当する一致箇所が無い場合はlen(self)を返す
+        """
+        if inclusive:
+            return bisect_left(self.starts, position)
+        return bisect_right(self.starts, position)
+
+    def previousIndex(self, position: int) -> int:
+        """
+        positionより前にある最後の一致箇所の番号を返す
+        該当する一致箇所が無い場合は-1を返す
+        """
+        return bisect_left(self.starts, position) - 1
+
+
+# 段落ごとに検索しても一致箇所が変わらない正規表現のエスケープ
+# 改行に一致しない文字クラスと、改行以外の制御文字
+BLOCKLOCALESCAPES = frozenset("dwSafrtv")
+
+
+def isBlockLocal(pattern: str, regex: bool) -> bool:
+    """
+    段落ごとに検索しても文書全体を検索した場合と同じ一致箇所になる場合は
+    Trueを返す
+    正規表現は確かめられる要素(リテラル, ., 量指定子, グループ, 選択,
+    改行を含まない文字クラス)のみからなる場合に限りTrueとする
+    改行に一致しうる要素や、文字列の端や前後の文字を参照する要素
+    (^, $, \\A, \\Z, \\b, 先読みなど)、フラグを含む場合はFalseを返す
+    """
+    if not regex:
+        return "\n" not in pattern
+    i = 0
+    length = len(pattern)
+    while i < length:
+        char = pattern[i]
+        if char == "\\":
+            escape = pattern[i + 1] if i + 1 < length else ""
+            if not isBlockLocalEscape(escape):
+                return False
+            i += 2
+        elif char == "[":
+            i = characterClassEnd(pattern, i)
+            if i < 0:
+                return False
+        elif char == "(" and pattern.startswith("(?", i):
+            if pattern.startswith("(?:", i):
+                i += 3
+            elif pattern.startswith("(?P<", i):
+                i = pattern.find(">", i) + 1
+                if i <= 0:
+                    return False
+            else:
+                return False
+        elif char in "^$\n":
+            return False
+        else:
+            i += 1
+    return True
+
+
+def isBlockLocalEscape(escape: str) -> bool:
+    """
+    エスケープされた文字が改行以外の1文字に一致する場合はTrueを返す
+    """
+    if not escape or escape == "\n":
+        return False
+    return escape in BLOCKLOCALESCAPES or not escape.isalnum()
+
+
+def characterClassEnd(pattern: str, start: int) -> int:
+    """
+    startの[から始まる文字クラスが改行を含まないリテラルと範囲のみからなる
+    場合はクラスの直後の位置を、それ以外の場合は-1を返す
+    """
+    i = start + 1
+    if pattern.startswith("^", i):
+        return -1
+    # 範囲の始点になりうる直前のリテラル
+    previous: str | None = None
+    length = len(pattern)
+    while i < length:
+        char = pattern[i]
+        if char == "]" and i > start + 1:
+            return i + 1
+        if char == "\\":
+            escape = pattern[i + 1] if i + 1 < length else ""
+            if not isBlockLocalEscape(escape):
+                return -1
+            previous = None if escape.isalnum() else escape
+            i += 2
+        elif char == "-" and previous is not None and i + 1 < length:
+            end = pattern[i + 1]
+            if end == "]":
+                previous = char
+                i += 1
+                continue
+            if end in "\\[" or previous <= "\n" <= end:
+                return -1
+            previous = None
+            i += 2
+        elif char == "\n":
+            return -1
+        else:
+            previous = char
+            i += 1
+    return -1
+
+
+@lru_cache(maxsize=64)
+def compilePattern(pattern: str, flags: int = 0) -> re.Pattern | re.error:
+    """
+    正規表現をコンパイルして返す
+    コンパイルに失敗した場合は例外を送出せずre.errorを返す
+    結果は(pattern, flags)ごとにキャッシュされ、入力の検証と検索で共有される
+    """
+    try:
+        return re.compile(pattern, flags)
+    except re.error as e:
+        return e
+
+
+def findSpans(string: str, pattern: str | re.Pattern) -> array:
+    """
+    文字列から一致箇所を[開始位置, 終了位置, 開始位置, ...]の配列で返す
+    patternがコンパイル済みの正規表現の場合はfinditerで、
+    文字列の場合は重なりを含めて検索する
+    """
+    spans = array("q")
+    if isinstance(pattern, re.Pattern):
+        for match in pattern.finditer(string):
+            spans.extend(match.span())
+    elif pattern:
+        length = len(pattern)
+        start = 0
+        while True:
+            index = string.find(pattern, start)
+            if index == -1:
+                break
+            spans.append(index)
+            spans.append(index + length)
+            start = index + 1
+    return spans
+
+
+class AhoCorasick:
+    """
+    複数の語を文字列の一度の走査で検索するAho-Corasickオートマトン
+    語どうしが重なる一致箇所もすべて返す
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms = list(dict.fromkeys(term for term in terms if term))
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail = [0]
+        self.output: list[list[int]] = [[]]
+
+        for termIndex, term in enumerate(self.terms):
+            state = 0
+            for char in term:
+                if char not in self.goto[state]:
+                    self.goto[state][char] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = self.goto[state][char]
+            self.output[state].append(termIndex)
+
+        # 幅優先で失敗遷移を求め、失敗先の出力を引き継ぐ
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nextState in self.goto[state].items():
+                queue.append(nextState)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[nextState] = self.goto[fail].get(char, 0)
+                if self.fail[nextState] == nextState:
+                    self.fail[nextState] = 0
+                self.output[nextState] += self.output[self.fail[nextState]]
+
+    def findAll(self, string: str) -> Iterator[tuple[int, int, int]]:
+        """
+        一致箇所を(開始位置, 終了位置, 語の番号)として終了位置順に返す
+        """
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        state = 0
+        for index, char in enumerate(string, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for termIndex in output[state]:
+                yield index - len(self.terms[termIndex]), index, termIndex
+
+    def search(
+        self,
+        string: str,
+        box: int,
+        textSource: Callable[[int, int], str] | None = None,
+    ) -> tuple[MatchSet, list[int]]:
+        """
+        一致箇所を開始位置順のMatchSetとして、語ごとの一致件数とともに返す
+        """
+        counts = [0] * len(self.terms)
+        spans = []
+        for start, end, termIndex in self.findAll(string):
+            spans.append((start, end))
+            counts[termIndex] += 1
+        spans.sort()
+        starts = array("q", (start for start, _ in spans))
+        ends = array("q", (end for _, end in spans))
+        return MatchSet(box, starts, ends, textSource), counts
+
+
+class FenwickTree:
+    """
+    要素の更新と先頭からの累積和の取得をO(log n)で行うFenwick木
+    """
+
+    def __init__(self, values: Iterable[int] = ()):
+        self.tree = [0, *values]
+        size = len(self.tree)
+        for i in range(1, size):
+            parent = i + (i & -i)
+            if parent < size:
+                self.tree[parent] += self.tree[i]
+
+    def __len__(self) -> int:
+        return len(self.tree) - 1
+
+    def add(self, index: int, delta: int):
+        """
+        index番目の要素にdeltaを加える
+        """
+        i = index + 1
+        size = len(self.tree)
+        while i < size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefixSum(self, index: int) -> int:
+        """
+        先頭からindex個の要素の和を返す
+        """
+        total = 0
+        i = index
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def total(self) -> int:
+        return self.prefixSum(len(self))
+
+    def find(self, k: int) -> int:
+        """
+        prefixSum(i) <= k < prefixSum(i + 1) を満たすiを返す
+        kが合計以上の場合はlen(self)を返す
+        """
+        index = 0
+        step = 1 << (len(self).bit_length())
+        while step:
+            next_ = index + step
+            if next_ < len(self.tree) and self.tree[next_] <= k:
+                index = next_
+                k -= self.tree[next_]
+            step >>= 1
+        return index
@@ -1,5 +1,4 @@
 import re
-from itertools import chain
 from typing import Literal
 
 from darkdetect import isDark
@@ -8,6 +7,7 @@ from PySide6.QtGui import QColor, QKeyEvent, QPalette
 from PySide6.QtWidgets import (
     QCheckBox,
     QDialogButtonBox,
+    QFileDialog,
     QHBoxLayout,
     QLabel,
     QLineEdit,
@@ -16,7 +16,8 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from .SearchOperation import Match
+from . import FileOperation
+from .SearchOperation import AhoCorasick, Match, MatchSet, compilePattern
 
 
 class SearchWindow(QWidget):
@@ -36,15 +37,39 @@ class SearchWindow(QWidget):
         self.place = -1
         self.matchesList = self.emptyMatchesList()
 
+        # 検索結果はボックスごとにキャッシュし、変更のあったボックスのみ再検索する
+        self.searchKey: tuple[str, bool] | None = None
+        self.dirtyBoxes: set[int] = set()
+        # バックグラウンドで検索中のボックス
+        self.pendingBoxes: set[int] = set()
+        # 用語リストによる複数語検索
+        self.termSearch: AhoCorasick | None = None
+        self.termCounts: list[list[int]] = []
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(200)
+        self.timer.timeout.connect(self.reset)
+
         self.initUI(mode)
 
         self.setFixedHeight(self.sizeHint().height())
         self.setFixedWidth(400)
 
-        self.timer = QTimer(self)
-        self.timer.setInterval(100)
-        self.timer.timeout.connect(self.reset)
-        self.timer.start()
+        self.documents = [
+            textEdit.document()
+            for textEdit in self.parent().textEditor.textEdits
+        ]
+        self.matchIndexes = [
+            textEdit.matchIndex
+            for textEdit in self.parent().textEditor.textEdits
+        ]
+        for document in self.documents:
+            document.contentsChanged.connect(self.documentChanged)
+        for matchIndex in self.matchIndexes:
+            matchIndex.matchesChanged.connect(self.matchesReady)
+
+        self.invalidate()
 
     def initUI(self, mode):
         hBox = QHBoxLayout(self)
@@ -95,6 +120,7 @@ class SearchWindow(QWidget):
             ("検索(&S)", "searchButtonClicked"),
             ("前へ(&P)", "moveToPreviousButtonClicked"),
             ("次へ(&N)", "moveToNextButtonClicked"),
+            ("用語リスト(&L)", "loadTermListButtonClicked"),
         ]
         if mode == "replace":
             buttons.extend(
@@ -113,9 +139,12 @@ class SearchWindow(QWidget):
         hBox.addWidget(dialogButtonBox)
 
         self.searchInput.textChanged.connect(self.validateRegex)
+        self.searchInput.textEdited.connect(self.clearTermList)
+        self.searchInput.textChanged.connect(lambda: self.invalidate())
         self.regexCheckBox.checkStateChanged.connect(
             lambda: self.validateRegex(self.searchInput.text())
         )
+        self.regexCheckBox.checkStateChanged.connect(lambda: self.invalidate())
 
     def changeWindowTitle(self):
         title = self.title + " "
@@ -123,8 +152,8 @@ class SearchWindow(QWidget):
         if self.place >= 0:
             title += f"{self.place + 1}/"
 
-        if self.searchInput.text():
-            title += f"{len(self._getMatches())}件"
+        if self.hasQuery():
+            title += f"{self.matchCount()}件"
 
         self.setWindowTitle(title)
 
@@ -147,11 +176,9 @@ class SearchWindow(QWidget):
             )
             self.messageLabelTimer.start()
 
-    def search(self, pattern, regex):
-        if not pattern:
-            return self.emptyMatchesList()
-
-        return self.parent().search(pattern, regex)
+    def search(self, pattern, regex, box, wait=False):
+        # 空の検索条件も渡し、各ボックスの索引を無効にする
+        return self.parent().search(pattern, regex, box, wait)
 
     def replace(self, match: Match, repl: str):
         return self.parent().replace(match, repl)
@@ -159,32 +186,82 @@ class SearchWindow(QWidget):
     def focus(self, match: Match):
         self.parent().focus(match)
 
-    def highlightMatches(self):
-        for i, matches in enumerate(self.matchesList):
-            self.parent().highlightMatches(matches, i)
+    def highlightMatches(self, box):
+        self.parent().highlightMatches(self.matchesList[box], box)
 
     def emptyMatchesList(self):
-        return [[] for _ in self.parent().textEditor.textEdits]
+        return [
+            MatchSet(box)
+            for box in range(len(self.parent().textEditor.textEdits))
+        ]
+
+    def matchCount(self) -> int:
+        return sum(len(matchSet) for matchSet in self.matchesList)
+
+    def matchAt(self, place: int) -> Match:
+        """
+        全ボックスを通してplace番目の一致箇所を返す
+        """
+        for matchSet in self.matchesList:
+            if place < len(matchSet):
+                return matchSet[place]
+            place -= len(matchSet)
+        raise IndexError(place)
+
+    def placeOf(self, box: int, index: int) -> int:
+        return (
+            sum(len(matchSet) for matchSet in self.matchesList[:box]) + index
+        )
+
+    def placeFromCursor(self, direction: int) -> int | None:
+        """
+        フォーカスのあるテキストボックスのカーソル位置から
+        次(directionが正)または前の一致箇所の番号を求める
+        テキストボックスにフォーカスが無い場合はNoneを返す
+        """
+        textEdits = self.parent().textEditor.textEdits
+        widget = self.parent().focusWidget()
+        if widget not in textEdits:
+            return None
+        box = textEdits.index(widget)
+        cursor = widget.textCursor()
+        matchSet = self.matchesList[box]
+
+        # 現在の一致箇所が選択されている場合は、開始位置が同じ一致箇所も順にたどる
+        if 0 <= self.place < self.matchCount():
+            match = self.matchAt(self.place)
+            if (match.box, match.start, match.end) == (
+                box,
+                cursor.selectionStart(),
+                cursor.selectionEnd(),
+            ):
+                return self.place + direction
 
-    def _getMatches(self):
-        return list(chain(*self.matchesList))
+        if direction > 0:
+            index = matchSet.nextIndex(
+                cursor.selectionStart(), inclusive=not cursor.hasSelection()
+            )
+        else:
+            index = matchSet.previousIndex(cursor.selectionStart())
+        return self.placeOf(box, index)
 
     def moveToMatch(self, direction):
         if not self.validateRegex(self.searchInput.text()):
             return
 
-        matches = self._getMatches()
-        if not self.searchInput.text() or not matches:
+        self.reset(wait=True)
+
+        matchesCount = self.matchCount()
+        if not self.hasQuery() or not matchesCount:
             self.changeMessageText(self.NO_MATCH_MESSAGE)
             return
 
-        matchesCount = len(matches)
-        if direction > 0:
-            self.place = (self.place + direction) % matchesCount
-        else:
-            self.place = (self.place + direction + matchesCount) % matchesCount
+        place = self.placeFromCursor(direction)
+        if place is None:
+            place = self.place + direction
+        self.place = place % matchesCount
 
-        match = matches[self.place]
+        match = self.matchAt(self.place)
         self.focus(match)
 
         currentPlace = self.parent().getCurrentPlace()
@@ -203,51 +280,53 @@ class SearchWindow(QWidget):
         self.moveToMatch(-1)
 
     def replaceFocusedText(self):
-        matches = self._getMatches()
+        self.reset(wait=True)
+        matchesCount = self.matchCount()
 
-        if not self.searchInput.text() or not matches:
+        if not self.hasQuery() or not matchesCount:
             self.changeMessageText(self.NO_MATCH_MESSAGE)
             return
 
-        if len(matches) - 1 < self.place:
+        if matchesCount - 1 < self.place:
             self.place = 0
 
         repl = self.replaceInput.text()
-        match = matches[self.place]
+        match = self.matchAt(self.place)
 
         self.replace(match, repl)
 
         self.reset()
 
     def afterReplace(self, moveTo: Literal["next", "previous"] = "next"):
-        matches = self._getMatches()
+        matchesCount = self.matchCount()
 
-        if len(matches) - 1 < self.place:
+        if matchesCount - 1 < self.place:
             self.place = 0
 
-        if not matches:
+        if not matchesCount:
             self.changeMessageText(self.NO_MATCH_MESSAGE)
             return
 
         if moveTo == "next":
-            self.focus(matches[self.place])
+            self.focus(self.matchAt(self.place))
         if moveTo == "previous":
-            self.focus(matches[self.place])
+            self.focus(self.matchAt(self.place))
             self.moveToPreviousMatch()
 
-        self.changeMessageText(matches[self.place].group)
+        self.changeMessageText(self.matchAt(self.place).group)
 
     def replaceAll(self):
+        self.reset(wait=True)
         repl = self.replaceInput.text()
-        for box, match in enumerate(self.matchesList):
-            self.parent().replaceAll(match, repl, box)
-        self.changeMessageText(f"- 全{len(self._getMatches())}件置換完了")
+        count = sum(
+            self.parent().replaceAll(matchSet, repl, box)
+            for box, matchSet in enumerate(self.matchesList)
+        )
+        self.changeMessageText(f"- 全{count}件置換完了")
 
     def validateRegex(self, text):
         if self.regexCheckBox.isChecked():
-            try:
-                re.compile(text)
-            except re.error:
+            if isinstance(compilePattern(text), re.error):
                 self.changeMessageText("* 正規表現に誤りあり", "red", False)
 
                 palette = self.searchInput.palette()
@@ -273,15 +352,114 @@ class SearchWindow(QWidget):
 
         return True
 
-    def reset(self):
-        searchText = self.searchInput.text()
-        regex = self.regexCheckBox.isChecked()
-        self.matchesList = self.search(searchText, regex)
-        if not self._getMatches() or not self.searchInput.text():
+    def invalidate(self, box: int | None = None):
+        """
+        指定したボックスの検索結果を無効にし、再検索を予約する
+        boxを指定しない場合はすべてのボックスを対象とする
+        """
+        if box is not None:
+            self.dirtyBoxes.add(box)
+        else:
+            self.searchKey = None
+        self.timer.start()
+
+    def documentChanged(self):
+        self.invalidate(self.documents.index(self.sender()))
+
+    def matchesReady(self):
+        """
+        バックグラウンドでの検索が完了したボックスの結果を反映する
+        """
+        box = self.matchIndexes.index(self.sender())
+        if box in self.pendingBoxes:
+            self.dirtyBoxes.add(box)
+            self.reset()
+
+    def reset(self, wait: bool = False):
+        """
+        無効になっている検索結果を更新する
+        waitがTrueの場合はバックグラウンドでの検索の完了を待つ
+        """
+        self.timer.stop()
+        searchKey = (self.searchInput.text(), self.regexCheckBox.isChecked())
+        if searchKey != self.searchKey:
+            self.searchKey = searchKey
+            self.dirtyBoxes = set(range(len(self.matchesList)))
+        if wait:
+            self.dirtyBoxes |= self.pendingBoxes
+        if not self.dirtyBoxes:
+            return
+
+        for box in sorted(self.dirtyBoxes):
+            if self.termSearch is not None:
+                self.search("", False, box)
+                self.matchesList[box], self.termCounts[box] = (
+                    self.parent().searchTerms(self.termSearch, box)
+                )
+            else:
+                self.matchesList[box] = self.search(*searchKey, box, wait)
+            self.highlightMatches(box)
+            if self.matchIndexes[box].isReady():
+                self.pendingBoxes.discard(box)
+            else:
+                self.pendingBoxes.add(box)
+        self.dirtyBoxes.clear()
+
+        if not self.matchCount() or not self.hasQuery():
             self.place = -1
-        self.highlightMatches()
+        if self.termSearch is not None:
+            self.messageLabel.setToolTip(self.termCountsText())
         self.changeWindowTitle()
 
+    def hasQuery(self) -> bool:
+        return bool(self.searchInput.text()) or self.termSearch is not None
+
+    def loadTermList(self, filePath: str) -> bool:
+        """
+        1行に1語を記した用語リストを読み込み、すべての語を一度に検索する
+        """
+        text = FileOperation.openFile(filePath)
+        if text is None:
+            return False
+        terms = [line.strip() for line in text.splitlines()]
+        termSearch = AhoCorasick(terms)
+        if not termSearch.terms:
+            return False
+
+        self.searchInput.setText("")
+        self.termSearch = termSearch
+        self.termCounts = [
+            [0] * len(termSearch.terms) for _ in self.matchesList
+        ]
+        self.place = -1
+        self.invalidate()
+        self.reset()
+        self.changeMessageText(
+            f"用語リスト: {len(termSearch.terms)}語 計{self.matchCount()}件",
+            delete=False,
+        )
+        return True
+
+    def clearTermList(self):
+        if self.termSearch is None:
+            return
+        self.termSearch = None
+        self.termCounts = []
+        self.messageLabel.setToolTip("")
+        self.changeMessageText("")
+        self.invalidate()
+
+    def termCountsText(self) -> str:
+        """
+        用語リストの語ごとの一致件数を返す
+        """
+        if self.termSearch is None:
+            return ""
+        return "\n".join(
+            f"{term}: {sum(counts[i] for counts in self.termCounts)}件"
+            for i, term in enumerate(self.termSearch.terms)
+        )
+
     def searchButtonClicked(self):
         self.moveToNextMatch()
 
@@ -295,6 +473,16 @@ class SearchWindow(QWidget):
     def replaceAllButtonClicked(self):
         self.replaceAll()
 
+    def loadTermListButtonClicked(self):
+        filePath = QFileDialog.getOpenFileName(
+            self,
+            "SoroEditor - 用語リストを開く",
+            "",
+            "テキストファイル(*.txt);;その他(*.*)",
+        )[0]
+        if filePath and not self.loadTermList(filePath):
+            self.changeMessageText("* 用語リストを読み込めませんでした", "red")
+
     def moveToNextButtonClicked(self):
         self.moveToNextMatch()
 
@@ -308,8 +496,14 @@ class SearchWindow(QWidget):
             super().keyPressEvent(event)
 
     def closeEvent(self, event):
+        # setTextはtextEditedを送出しないため、用語リストは明示的に破棄する
+        self.clearTermList()
         self.searchInput.setText("")
         self.reset()
+        for document in self.documents:
+            document.contentsChanged.disconnect(self.documentChanged)
+        for matchIndex in self.matchIndexes:
+            matchIndex.matchesChanged.disconnect(self.matchesReady)
         self.parent().subWindows["SearchWindow"] = None
         self.deleteLater()
 
@@ -0,0 +1,55 @@
+import re
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from .SearchOperation import findSpans
+
+
+class CancellationToken:
+    """
+    実行中の検索を中断するためのトークン
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+
+    def cancel(self):
+        self.event.set()
+
+    def isCancelled(self) -> bool:
+        return self.event.is_set()
+
+
+class SearchWorkerSignals(QObject):
+    finished = Signal(int, object)
+
+
+class SearchWorker(QRunnable):
+    """
+    文書のスナップショットを段落ごとに検索するワーカー
+    段落ごとにトークンを確認し、中断された場合は結果としてNoneを返す
+    """
+
+    def __init__(
+        self,
+        texts: list[str],
+        pattern: str | re.Pattern,
+        generation: int,
+    ):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.texts = texts
+        self.pattern = pattern
+        self.generation = generation
+        self.token = CancellationToken()
+        self.signals = SearchWorkerSignals()
+
+    def run(self):
+        blockMatches: list | None = []
+        for text in self.texts:
+            if self.token.isCancelled():
+                blockMatches = None
+                break
+            blockMatches.append(findSpans(text, self.pattern))
+        self.signals.finished.emit(self.generation, blockMatches)
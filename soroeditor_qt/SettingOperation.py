@@ -1,10 +1,11 @@
 import copy
 from pathlib import Path
+from types import MappingProxyType
 
 import yaml
-from PySide6.QtGui import QFontDatabase
+from PySide6.QtCore import QCoreApplication, QTimer
 
-from . import DataOperation, FileOperation
+from . import DataOperation, FileOperation, FontCatalog
 from .logSetting import logSetting
 
 logger = logSetting(__name__)
@@ -12,6 +13,7 @@ logger = logSetting(__name__)
 __PATH = Path.home() / ".soroeditor" / "setting.yaml"
 
 __DEFAULTSETTINGDATA = {
+    "Compression": "None",
     "FileHistory": [],
     "Font": "",
     "FontSize": 0,
@@ -44,17 +46,29 @@ __DEFAULTSETTINGDATA = {
     "Version": "0.0.0",
 }
 
-__globalSettingData: dict
+# 設定は読み取り専用のスナップショットとして保持し、変更時は新しく作り直す
+__globalSettingData: MappingProxyType = MappingProxyType({})
 
-__projectSettingData: dict
+# 設定ファイルに書き込まれていない変更のあったキー
+__dirtyKeys: set = set()
+
+# 最後に読み込んだ、または書き込んだ設定ファイルの内容
+__writtenYaml: str | None = None
+
+# 設定の変更をまとめて書き込むまでの時間(ミリ秒)
+WRITEDELAY = 1000
+
+__writeTimer: QTimer | None = None
 
 
 def openSettingFile() -> dict:
+    global __writtenYaml
     dic: dict = {}
     yml = FileOperation.openFile(__PATH)
     if yml:
+        __writtenYaml = yml
         try:
-            dic = yaml.safe_load(yml)
+            dic = DataOperation.loadYaml(yml)
         except (
             KeyError,
             UnicodeDecodeError,
@@ -62,14 +76,60 @@ def openSettingFile() -> dict:
             yaml.scanner.ScannerError,
             yaml.constructor.ConstructorError,
         ) as e:
-            logger.error(f"Failed to load Yaml data.: {e}")
+            logger.error("Failed to load Yaml data.: %s", e)
     return dic
 
 
 def writeSettingFile(data: dict) -> bool:
-    return FileOperation.writeToFile(
-        DataOperation.makeDataToYaml(data), __PATH
-    )
+    """
+    設定ファイルに書き込む
+    内容が設定ファイルと同じ場合は書き込まない
+    """
+    global __writtenYaml
+    yml = DataOperation.makeDataToYaml(thaw(data))
+    if not yml:
+        return False
+    if freeze(data) == __globalSettingData:
+        __dirtyKeys.clear()
+        if __writeTimer is not None:
+            __writeTimer.stop()
+    if yml == __writtenYaml:
+        return True
+    ret = FileOperation.writeToFile(yml, __PATH)
+    if ret:
+        __writtenYaml = yml
+    return ret
+
+
+def scheduleSettingFileWrite():
+    """
+    一定時間後に設定ファイルへ書き込む
+    その間の変更はまとめて書き込まれる
+    """
+    global __writeTimer
+    app = QCoreApplication.instance()
+    if app is None:
+        flushSettingFile()
+        return
+    if __writeTimer is None:
+        __writeTimer = QTimer()
+        __writeTimer.setSingleShot(True)
+        __writeTimer.setInterval(WRITEDELAY)
+        __writeTimer.timeout.connect(flushSettingFile)
+        app.aboutToQuit.connect(flushSettingFile)
+    __writeTimer.start()
+
+
+def flushSettingFile() -> bool:
+    """
+    書き込まれていない変更があれば設定ファイルに書き込む
+    """
+    if __writeTimer is not None:
+        __writeTimer.stop()
+    if not __dirtyKeys:
+        return True
+    logger.debug("Changed settings: %s", sorted(map(str, __dirtyKeys)))
+    return writeSettingFile(__globalSettingData)
 
 
 def makeNewSettingFile() -> bool:
@@ -84,6 +144,7 @@ def settingVerification(dic: dict) -> dict:
     fontSize = dic.get("FontSize", None)
     fileHistory = dic.get("FileHistory", None)
     toolBar = dic.get("ToolBar", None)
+    compression = dic.get("Compression", None)
 
     default = defaultSettingData()
 
@@ -103,12 +164,12 @@ def settingVerification(dic: dict) -> dict:
     else:
         dic["Resizable"] = default["Resizable"]
 
-    if font in QFontDatabase.families(QFontDatabase.WritingSystem.Any):
+    if FontCatalog.hasFamily(font):
         pass
     else:
         dic["Font"] = default["Font"]
 
-    if fontStyle in QFontDatabase.styles(font):
+    if FontCatalog.hasStyle(font, fontStyle):
         pass
     else:
         dic["FontStyle"] = default["FontStyle"]
@@ -128,28 +189,106 @@ def settingVerification(dic: dict) -> dict:
     else:
         dic["ToolBar"] = default["ToolBar"]
 
+    if compression in FileOperation.COMPRESSIONS:
+        pass
+    else:
+        dic["Compression"] = default["Compression"]
+
     return dic
 
 
+def freeze(obj):
+    """
+    dictをMappingProxyTypeに、listをtupleに再帰的に変換した
+    読み取り専用の値を返す
+    """
+    if isinstance(obj, MappingProxyType):
+        return obj
+    if isinstance(obj, dict):
+        return MappingProxyType(
+            {key: freeze(value) for key, value in obj.items()}
+        )
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(value) for value in obj)
+    return obj
+
+
+def thaw(obj):
+    """
+    freezeした値を変更可能なdictとlistに戻す
+    """
+    if isinstance(obj, (dict, MappingProxyType)):
+        return {key: thaw(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [thaw(value) for value in obj]
+    return obj
+
+
+def freezeSettings(dic: dict, previous: MappingProxyType) -> MappingProxyType:
+    """
+    設定をfreezeする
+    値が変わっていないキーは以前のスナップショットの値をそのまま使う
+    """
+    frozen = {}
+    for key, value in dic.items():
+        value = freeze(value)
+        if key in previous and previous[key] == value:
+            value = previous[key]
+        frozen[key] = value
+    return MappingProxyType(frozen)
+
+
 def defaultSettingData() -> dict:
     return copy.deepcopy(__DEFAULTSETTINGDATA)
 
 
-def globalSettingData() -> dict:
-    return copy.deepcopy(__globalSettingData)
+def globalSettingData() -> MappingProxyType:
+    """
+    設定のスナップショットを返す
+    変更する場合はthawしたものを変更してsetGlobalSettingDataに渡す
+    """
+    return __globalSettingData
 
 
 def setGlobalSettingData(dic: dict):
-    dic = settingVerification(dic)
+    """
+    設定を変更し、変更のあったキーを設定ファイルに書き込む予定に加える
+    """
     global __globalSettingData
+    dic = freezeSettings(settingVerification(thaw(dic)), __globalSettingData)
+    for key in dic.keys() | __globalSettingData.keys():
+        if dic.get(key) != __globalSettingData.get(key):
+            __dirtyKeys.add(key)
     __globalSettingData = dic
-
-
-def projectSettingData() -> dict:
-    return copy.deepcopy(__projectSettingData)
-
-
-def setProjectSettingData(dic: dict):
-    dic = settingVerification(dic)
-    global __projectSettingData
-    __projectSettingData = dic
+    if __dirtyKeys:
+        scheduleSettingFileWrite()
+
+
+class ProjectSetting:
+    """
+    ウィンドウごとのプロジェクト設定
+    """
+
+    def __init__(self, dic: dict | MappingProxyType):
+        self._data: MappingProxyType = MappingProxyType({})
+        self._revision = 0
+        self.setData(dic)
+
+    def data(self) -> MappingProxyType:
+        """
+        プロジェクト設定のスナップショットを返す
+        変更する場合はthawしたものを変更してsetDataに渡す
+        """
+        return self._data
+
+    def setData(self, dic: dict | MappingProxyType):
+        dic = freezeSettings(settingVerification(thaw(dic)), self._data)
+        if dic != self._data:
+            self._revision += 1
+        self._data = dic
+
+    def revision(self) -> int:
+        """
+        プロジェクト設定が変更されるたびに増加するリビジョン番号を返す
+        """
+        return self._revision
@@ -1,6 +1,6 @@
 from PySide6 import QtCore
 from PySide6.QtCore import Qt
-from PySide6.QtGui import QFont, QFontDatabase, QGuiApplication
+from PySide6.QtGui import QFont, QGuiApplication
 from PySide6.QtWidgets import (
     QCheckBox,
     QComboBox,
@@ -15,10 +15,16 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from . import SettingOperation
+from . import FontCatalog, SettingOperation
 
 
 class SettingWindow(QWidget):
+    compressionPairs = [
+        ("圧縮しない", "None"),
+        ("zlib (gzip)", "zlib"),
+        ("lzma (xz)", "lzma"),
+    ]
+
     def __init__(self, parent: QWidget, mode: str = "Default") -> None:
         super().__init__(parent)
         if mode not in ("Default", "Project"):
@@ -27,7 +33,9 @@ class SettingWindow(QWidget):
         self.mode = mode
         self.dataByMode: dict = {}
         if mode == "Default":
-            self.dataByMode["Settings"] = SettingOperation.globalSettingData()
+            self.dataByMode["Settings"] = SettingOperation.thaw(
+                SettingOperation.globalSettingData()
+            )
             self.dataByMode["WindowTitle"] = "デフォルト設定"
             self.dataByMode["SaveSuccessMessage"] = (
                 "SoroEditor - Infomation",
@@ -38,7 +46,9 @@ class SettingWindow(QWidget):
                 "設定の保存に失敗しました",
             )
         elif mode == "Project":
-            self.dataByMode["Settings"] = SettingOperation.projectSettingData()
+            self.dataByMode["Settings"] = SettingOperation.thaw(
+                parent.projectSetting.data()  # type: ignore
+            )
             self.dataByMode["WindowTitle"] = "プロジェクト設定"
             self.dataByMode["SaveSuccessMessage"] = (
                 "SoroEditor - Infomation",
@@ -110,6 +120,10 @@ class SettingWindow(QWidget):
         windowSizeComboBox.addItems(sizeCandidate + ["Maximize", "FullScreen"])
         # リサイズ可能チェックボックス
         resizeableCheckbox = QCheckBox("手動でのリサイズを許可")
+        # プロジェクトファイルの圧縮
+        compressionComboBox = QComboBox()
+        for text, compression in self.compressionPairs:
+            compressionComboBox.addItem(text, compression)
         # vBox1へウィジェットを追加
         self.widgetsForVBox1 = [
             QLabel("フォントファミリ"),
@@ -121,6 +135,8 @@ class SettingWindow(QWidget):
             QLabel("ウィンドウサイズ"),
             windowSizeComboBox,
             resizeableCheckbox,
+            QLabel("プロジェクトファイルの圧縮"),
+            compressionComboBox,
         ]
         self.addWidgetsFor(vBox1, self.widgetsForVBox1)
         vBox1.addStretch(1)
@@ -202,7 +218,7 @@ class SettingWindow(QWidget):
     def setFontStyleNames(self):
         family = self.widgetsForVBox1[1].currentText()
         font = QFont(family)
-        fontStyleNames = QFontDatabase.styles(family)
+        fontStyleNames = list(FontCatalog.styles(family))
         comboBox = self.widgetsForVBox1[3]
 
         comboBox.clear()
@@ -253,20 +269,25 @@ class SettingWindow(QWidget):
         resizable = self.widgetsForVBox1[8].isChecked()
         self.dataByMode["Settings"]["Resizable"] = resizable
 
+        compression = self.widgetsForVBox1[10].currentData()
+        self.dataByMode["Settings"]["Compression"] = compression
+
     def saveSettings(self) -> bool:
         self.gatherSettings()
 
         if self.mode == "Default":
             SettingOperation.setGlobalSettingData(self.dataByMode["Settings"])
             if self.settingCoverageCheckbox.isChecked():
-                SettingOperation.setProjectSettingData(
+                self.parent().projectSetting.setData(  # type: ignore
                     self.dataByMode["Settings"]
                 )
             ret = SettingOperation.writeSettingFile(
                 self.dataByMode["Settings"]
             )
         elif self.mode == "Project":
-            SettingOperation.setProjectSettingData(self.dataByMode["Settings"])
+            self.parent().projectSetting.setData(  # type: ignore
+                self.dataByMode["Settings"]
+            )
             if self.settingCoverageCheckbox.isChecked():
                 fileHistory = SettingOperation.globalSettingData()[
                     "FileHistory"
@@ -295,16 +316,15 @@ class SettingWindow(QWidget):
         default = SettingOperation.defaultSettingData()
 
         font = settings.get("Font", default["Font"])
-        if font not in QFontDatabase.families(QFontDatabase.WritingSystem.Any):
+        if not FontCatalog.hasFamily(font):
             font = QFont().defaultFamily()
         self.widgetsForVBox1[1].setCurrentFont(font)
 
         fontStyle = settings.get("FontStyle", default["FontStyle"])
-        if fontStyle not in QFontDatabase.styles(font):
-            fontStyle = QFontDatabase.styles(font)[0]
-        self.widgetsForVBox1[3].setCurrentIndex(
-            QFontDatabase.styles(font).index(fontStyle)
-        )
+        fontStyles = FontCatalog.styles(font)
+        if fontStyle not in fontStyles:
+            fontStyle = fontStyles[0]
+        self.widgetsForVBox1[3].setCurrentIndex(fontStyles.index(fontStyle))
 
         fontSize = settings.get("FontSize", default["FontSize"])
         if type(fontSize) is not int:
@@ -332,6 +352,12 @@ class SettingWindow(QWidget):
             resizable = default["Resizable"]
         self.widgetsForVBox1[8].setChecked(resizable)
 
+        compression = settings.get("Compression", default["Compression"])
+        index = self.widgetsForVBox1[10].findData(compression)
+        if index == -1:
+            index = self.widgetsForVBox1[10].findData(default["Compression"])
+        self.widgetsForVBox1[10].setCurrentIndex(index)
+
 
 class ToolBarSettingWindow(QWidget):
     def __init__(self, parent: QWidget):
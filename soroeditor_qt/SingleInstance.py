@@ -0,0 +1,107 @@
+"""
+起動中のSoroEditorにファイルを渡し、同じプロセスの新しいウィンドウで開く
+
+最初に起動したSoroEditorがローカルサーバーを立て、後から起動したものは
+開くファイルのパスを1行で送る。受け取った側は"ok"を返してから開く
+"""
+
+import getpass
+from functools import partial
+
+from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+from .logSetting import logSetting
+
+logger = logSetting(__name__)
+
+SERVERNAME = f"soroeditor-qt-{getpass.getuser()}"
+TIMEOUT = 1000
+
+
+def connect() -> QLocalSocket | None:
+    socket = QLocalSocket()
+    socket.connectToServer(SERVERNAME)
+    if not socket.waitForConnected(TIMEOUT):
+        return None
+    return socket
+
+
+def sendToRunningInstance(filePath: str) -> bool:
+    """
+    起動中のSoroEditorにファイルを開かせる
+    受け取られた場合はTrueを返す
+    """
+    socket = connect()
+    if socket is None:
+        return False
+    socket.write(f"{filePath}\n".encode("utf-8"))
+    if not socket.waitForBytesWritten(TIMEOUT):
+        return False
+    reply = b""
+    while not reply.endswith(b"\n") and socket.waitForReadyRead(TIMEOUT):
+        reply += socket.readAll().data()
+    socket.disconnectFromServer()
+    return reply == b"ok\n"
+
+
+class InstanceServer(QObject):
+    """
+    後から起動したSoroEditorからファイルのパスを受け取る
+    """
+
+    openRequested = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.server = QLocalServer(self)
+        # 他のユーザーからは接続できないようにする
+        self.server.setSocketOptions(
+            QLocalServer.SocketOption.UserAccessOption
+        )
+        self.server.newConnection.connect(self.newConnection)
+
+    def listen(self) -> bool:
+        """
+        ローカルサーバーを立てる
+        既に起動中のSoroEditorがある場合はFalseを返す
+        """
+        # UserAccessOptionを指定したlistenは既存のソケットを置き換えるため、
+        # 先に起動中のSoroEditorが無いか確認する
+        socket = connect()
+        if socket is not None:
+            socket.disconnectFromServer()
+            return False
+        if self.server.listen(SERVERNAME):
+            return True
+        # 異常終了したSoroEditorのソケットが残っている
+        QLocalServer.removeServer(SERVERNAME)
+        if self.server.listen(SERVERNAME):
+            return True
+        logger.error(
+            "Failed to listen on %s: %s", SERVERNAME, self.server.errorString()
+        )
+        return False
+
+    @Slot()
+    def newConnection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.readyRead.connect(partial(self.readRequest, socket))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def readRequest(self, socket: QLocalSocket):
+        if not socket.canReadLine():
+            return
+        line = socket.readLine().data()
+        try:
+            filePath = line.decode("utf-8").rstrip("\n")
+        except UnicodeDecodeError as e:
+            logger.error("Received an invalid file path: %s", e)
+            socket.disconnectFromServer()
+            return
+        socket.write(b"ok\n")
+        socket.flush()
+        socket.disconnectFromServer()
+        logger.info("Open %s requested by another instance", filePath)
+        self.openRequested.emit(filePath)
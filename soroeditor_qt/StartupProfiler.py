@@ -0,0 +1,106 @@
+"""
+起動にかかる時間を段階ごとに計測する
+
+--profile-startup を指定して起動した場合のみ計測し、
+最初にイベントループが処理を始めた時点で結果をログに書き込む
+--profile-startup=<ファイル> を指定した場合は、cProfileの結果を
+pstats形式でそのファイルにも書き込む
+"""
+
+import cProfile
+from contextlib import contextmanager
+from time import perf_counter
+
+from .logSetting import logSetting
+
+logger = logSetting(__name__)
+
+OPTION = "--profile-startup"
+
+__enabled = False
+__startTime = 0.0
+# (段階の名前, 入れ子の深さ, 開始時刻, 終了時刻)
+__phases: list[tuple[str, int, float, float]] = []
+__depth = 0
+__profile: cProfile.Profile | None = None
+__profilePath = ""
+
+
+def configure(argv: list[str]):
+    """
+    起動時の引数から計測の指定を取り除き、指定があれば計測を始める
+    argvは直接変更する
+    """
+    global __enabled, __startTime, __profile, __profilePath
+    options = [
+        arg for arg in argv if arg == OPTION or arg.startswith(f"{OPTION}=")
+    ]
+    if not options:
+        return
+    argv[:] = [arg for arg in argv if arg not in options]
+
+    __enabled = True
+    __startTime = perf_counter()
+    __phases.clear()
+    _, _, __profilePath = options[-1].partition("=")
+    if __profilePath:
+        __profile = cProfile.Profile()
+        __profile.enable()
+
+
+def isEnabled() -> bool:
+    return __enabled
+
+
+@contextmanager
+def phase(name: str):
+    """
+    withで囲んだ処理を一つの段階として計測する
+    計測していない場合は何もしない
+    """
+    global __depth
+    if not __enabled:
+        yield
+        return
+    start = perf_counter()
+    __depth += 1
+    try:
+        yield
+    finally:
+        __depth -= 1
+        __phases.append((name, __depth, start, perf_counter()))
+
+
+def finish():
+    """
+    計測を終え、結果をログに書き込む
+    """
+    global __enabled, __profile
+    if not __enabled:
+        return
+    __enabled = False
+    end = perf_counter()
+    if __profile is not None:
+        __profile.disable()
+        try:
+            __profile.dump_stats(__profilePath)
+        except OSError as e:
+            logger.error(
+                "Failed to write the profile %s: %s", __profilePath, e
+            )
+        else:
+            logger.info("Startup profile was written to %s", __profilePath)
+        __profile = None
+
+    lines = [f"{'phase':<40s} {'start[ms]':>10s} {'elapsed[ms]':>12s}"]
+    # 開始した順に、入れ子の段階は字下げして並べる
+    for name, depth, start, stop in sorted(__phases, key=lambda p: p[2]):
+        label = f"{'  ' * depth}{name}"
+        lines.append(
+            f"{label:<40s} {(start - __startTime) * 1000:>10.1f}"
+            f" {(stop - start) * 1000:>12.1f}"
+        )
+    lines.append(
+        f"{'total':<40s} {'':>10s} {(end - __startTime) * 1000:>12.1f}"
+    )
+    logger.info("Startup profile\n" + "\n".join(lines))
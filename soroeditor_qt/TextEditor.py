@@ -1,21 +1,32 @@
-import re
+from functools import partial
 
 from darkdetect import isDark
-from PySide6.QtCore import Qt, Signal, Slot
-from PySide6.QtGui import QFocusEvent, QPalette, QTextCharFormat, QTextCursor
+from PySide6.QtCore import Qt, QTimer, Signal, Slot
+from PySide6.QtGui import (
+    QFocusEvent,
+    QPalette,
+    QResizeEvent,
+    QTextCharFormat,
+    QTextCursor,
+)
 from PySide6.QtWidgets import (
     QHBoxLayout,
     QLineEdit,
     QPlainTextEdit,
     QScrollBar,
+    QTextEdit,
     QVBoxLayout,
     QWidget,
 )
 
-from .SearchOperation import Match
+from .MatchIndex import MatchIndex
+from .ProgressiveLoader import ProgressiveLoader
+from .SearchOperation import AhoCorasick, Match, MatchSet
 
 
 class TextEditor(QWidget):
+    modificationChanged = Signal()
+
     def __init__(
         self,
         parent: QWidget,
@@ -26,10 +37,18 @@ class TextEditor(QWidget):
         self.textEdits = [PlainTextEdit() for _ in range(numberOfBoxes)]
         self.lineEdits = [LineEdit() for _ in range(numberOfBoxes)]
         self.boxStretches = boxStretches
+        # 編集のたびに増える番号
+        # 保存中に編集されたかどうかの判定に使う
+        self.editRevision = 0
+        # ボックスごとの編集の番号
+        # 保存時に変換済みの断片を再利用できるかの判定に使う
+        self.boxRevisions = [0] * numberOfBoxes
+        self.padding = False
+        self.loader: ProgressiveLoader | None = None
         self.makeLayout()
 
     def makeLayout(self):
-        for textEdit in self.textEdits:
+        for i, textEdit in enumerate(self.textEdits):
             textEdit.verticalScrollBar().valueChanged.connect(
                 self.textBoxScrollBarValueChanged
             )
@@ -40,8 +59,17 @@ class TextEditor(QWidget):
             textEdit.cursorPositionChanged.connect(self.cursorPositionChanged)
             textEdit.focusReceived.connect(self.focusReceived)
             textEdit.setTabChangesFocus(True)
+            textEdit.document().modificationChanged.connect(
+                self.modificationChanged
+            )
+            textEdit.document().contentsChanged.connect(self.contentsChanged)
+            textEdit.document().contentsChanged.connect(
+                partial(self.boxChanged, i)
+            )
         for lineEdit in self.lineEdits:
             lineEdit.cursorPositionChanged.connect(self.cursorPositionChanged)
+            lineEdit.textEdited.connect(self.modificationChanged)
+            lineEdit.textChanged.connect(self.contentsChanged)
             lineEdit.focusReceived.connect(self.focusReceived)
             if lineEdit.style().name() == "windows11":
                 lineEdit.setTextMargins(-5, 0, 0, 0)
@@ -106,7 +134,7 @@ class TextEditor(QWidget):
                 textEdit.verticalScrollBar().maximum()
                 <= textEdit.verticalScrollBar().pageStep()
             ):
-                textEdit.appendPlainText("\n")
+                self.appendPadding(textEdit, "\n")
                 textEdit.verticalScrollBar().setValue(0)
             while (
                 textEdit.verticalScrollBar().maximum()
@@ -115,11 +143,51 @@ class TextEditor(QWidget):
                 textEdit.verticalScrollBar().setValue(
                     textEdit.verticalScrollBar().maximum() - 2
                 )
-                textEdit.appendPlainText("\n")
+                self.appendPadding(textEdit, "\n")
                 textEdit.verticalScrollBar().setValue(
                     textEdit.verticalScrollBar().maximum() - 2
                 )
 
+    def appendPadding(self, textEdit: "PlainTextEdit", text: str):
+        """
+        スクロール用の改行を追加する
+        末尾の改行は保存時に取り除かれるため、変更済みの状態は変化させない
+        """
+        document = textEdit.document()
+        modified = document.isModified()
+        self.padding = True
+        textEdit.appendPlainText(text)
+        self.padding = False
+        if not modified:
+            document.setModified(False)
+
+    def isModified(self) -> bool:
+        """
+        いずれかのテキストボックスまたはラインエディットが変更されていればTrueを返す
+        """
+        return any(
+            textEdit.document().isModified() for textEdit in self.textEdits
+        ) or any(lineEdit.isModified() for lineEdit in self.lineEdits)
+
+    def setModified(self, modified: bool):
+        """
+        すべてのテキストボックスとラインエディットの変更済み状態を設定する
+        """
+        for textEdit in self.textEdits:
+            textEdit.document().setModified(modified)
+        for lineEdit in self.lineEdits:
+            lineEdit.setModified(modified)
+        self.modificationChanged.emit()
+
+    @Slot()
+    def contentsChanged(self):
+        if not self.padding:
+            self.editRevision += 1
+
+    def boxChanged(self, box: int):
+        if not self.padding:
+            self.boxRevisions[box] += 1
+
     @Slot()
     def textChanged(self):
         return
@@ -156,7 +224,7 @@ class TextEditor(QWidget):
             bar = textEdit.verticalScrollBar()
             diff = value - bar.maximum()
             if diff > 0:
-                textEdit.appendPlainText("\n" * diff)
+                self.appendPadding(textEdit, "\n" * diff)
             else:
                 textEdit.verticalScrollBar().setValue(value)
 
@@ -208,6 +276,30 @@ class TextEditor(QWidget):
             self.lineEdits[i].setText(dic[i]["title"])
             self.addReturn()
 
+    def loadTextInTextBoxes(self, dic: dict) -> ProgressiveLoader:
+        """
+        テキストボックスに文章をイベントループの合間に少しずつ読み込む
+        読み込み中の場合は中断してから読み込みを始める
+        """
+        self.cancelLoading()
+        self.loader = ProgressiveLoader(self, dic)
+        return self.loader
+
+    def isLoading(self) -> bool:
+        return self.loader is not None and self.loader.isLoading()
+
+    def finishLoading(self):
+        """
+        読み込み中の場合は残りをすべて読み込む
+        """
+        if self.loader is not None:
+            self.loader.finish()
+
+    def cancelLoading(self):
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader = None
+
 
 class PlainTextEdit(QPlainTextEdit):
     focusReceived = Signal()
@@ -231,10 +323,35 @@ class PlainTextEdit(QPlainTextEdit):
 
         self.setPalette(palette)
 
+        self.matchIndex = MatchIndex(self.document())
+
+        # 検索結果のハイライトは表示範囲内の一致箇所のみ
+        # ExtraSelectionとして描画し、文書の書式は変更しない
+        self.highlightFormat = QTextCharFormat()
+        self.highlightedMatches = MatchSet(-1)
+        self.highlightedRange: tuple[int, int] | None = None
+        # 文書の編集後、新しい検索結果を受け取るまでは一致箇所の位置が古いため、
+        # 表示中のハイライトはそのままにし、新たに作らない
+        self.highlightStale = False
+        # スクロールやサイズの変更は文書の編集中にも起こるため、
+        # ハイライトの更新はイベントループに戻ってからまとめて行う
+        self.highlightTimer = QTimer(self)
+        self.highlightTimer.setSingleShot(True)
+        self.highlightTimer.setInterval(0)
+        self.highlightTimer.timeout.connect(self.updateHighlight)
+        self.verticalScrollBar().valueChanged.connect(
+            self.highlightTimer.start
+        )
+        self.document().contentsChange.connect(self.markHighlightStale)
+
     def focusInEvent(self, event: QFocusEvent) -> None:
         super().focusInEvent(event)
         self.focusReceived.emit()
 
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        super().resizeEvent(event)
+        self.highlightTimer.start()
+
     def focusNextPrevChild(self, next: bool) -> bool:
         rect = self.cursorRect()
         for textEdit in self.parent().textEdits:
@@ -252,72 +369,135 @@ class PlainTextEdit(QPlainTextEdit):
         cursor.setPosition(match.end, QTextCursor.MoveMode.KeepAnchor)
         cursor.insertText(repl)
 
-    def replaceAll(self, matches: list[Match], repl: str):
-        document = self.document()
-        cursors: list[QTextCursor] = []
-        for match in matches:
-            cursor = QTextCursor(document)
-            cursor.setPosition(match.start)
-            cursor.setPosition(match.end, QTextCursor.MoveMode.KeepAnchor)
-            cursors.append(cursor)
-
-        for cursor in cursors:
-            cursor.insertText(repl)
-
-    def findMatches(self, string, pattern, regex):
-        box = self.boxNumber()
-        matches = []
-        if regex:
-            try:
-                pattern = re.compile(pattern)
-                for match in pattern.finditer(string):
-                    matches.append(
-                        Match(match.start(), match.end(), match.group(), box)
-                    )
-            except re.error:
-                return []
-        else:
-            start = 0
-            while True:
-                index = string.find(pattern, start)
-                if index == -1:
-                    break
-                matches.append(
-                    Match(index, index + len(pattern), pattern, box)
-                )
-                start = index + 1
-        return matches
-
-    def search(self, pattern: str, regex: bool):
-        document = self.document()
-        string = document.toPlainText()
-
-        # Matchオブジェクトを取得
-        return self.findMatches(string, pattern, regex)
-
-    def highlightMatches(self, matches: list[Match]):
-        document = self.document()
-        highlightFormat = QTextCharFormat()
-
-        # 既存のハイライトを削除
-        cursor = QTextCursor(document)
+    def replaceAll(self, matches: MatchSet, repl: str) -> int:
+        """
+        すべての一致箇所を置換し、置換した件数を返す
+        最初の一致箇所から最後の一致箇所までの置換後の文字列を一度に組み立て、
+        一回の編集として反映するため、取り消しも一度で行える
+        重なった一致箇所は先に現れたもののみを置換する
+        """
+        if not len(matches):
+            return 0
+
+        first = matches.starts[0]
+        last = max(matches.ends)
+        text = self.textBetween(first, last)
+
+        # textの先頭からの位置で扱う
+        pieces = []
+        position = 0
+        count = 0
+        for start, end in matches.spans():
+            start -= first
+            if start < position:
+                continue
+            pieces.append(text[position:start])
+            pieces.append(repl)
+            position = end - first
+            count += 1
+        pieces.append(text[position:])
+
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(first)
+        cursor.setPosition(last, QTextCursor.MoveMode.KeepAnchor)
         cursor.beginEditBlock()
-        cursor.select(QTextCursor.SelectionType.Document)
-        cursor.setCharFormat(QTextCharFormat())
+        cursor.insertText("".join(pieces))
         cursor.endEditBlock()
+        return count
+
+    def search(self, pattern: str, regex: bool, wait: bool = False):
+        # 索引は条件が変わった場合のみ文書全体を検索し、
+        # それ以外は変更のあった段落のみを検索し直している
+        # 文書全体の検索中は、waitがFalseであれば空のリストを返す
+        self.matchIndex.setPattern(pattern, regex)
+        if wait:
+            self.matchIndex.waitForReady()
+        elif not self.matchIndex.isReady():
+            return MatchSet(self.boxNumber())
+
+        # 一致箇所の位置と一致した文字列は、参照時に索引と文書から取得する
+        starts, ends = self.matchIndex.positions()
+        return MatchSet(self.boxNumber(), starts, ends, self.textBetween)
+
+    def searchTerms(
+        self, termSearch: AhoCorasick
+    ) -> tuple[MatchSet, list[int]]:
+        """
+        用語リストのすべての語を一度の走査で検索し、語ごとの一致件数とともに返す
+        """
+        return termSearch.search(
+            self.toPlainText(), self.boxNumber(), self.textBetween
+        )
+
+    def textBetween(self, start: int, end: int) -> str:
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        return cursor.selectedText().replace("\u2029", "\n")
 
+    def highlightMatches(self, matches: MatchSet):
         highlightColor = self.palette().color(QPalette.ColorRole.Window)
         if isDark():
             highlightColor.setRgbF(0.4, 0.4, 0.4, 1.0)
         else:
             highlightColor.setRgbF(0.6, 0.6, 0.6, 1.0)
-        highlightFormat.setBackground(highlightColor)
+        self.highlightFormat.setBackground(highlightColor)
 
-        for match in matches:
+        self.highlightedMatches = matches
+        self.highlightedRange = None
+        self.highlightStale = False
+        self.highlightTimer.stop()
+        self.updateHighlight()
+
+    @Slot(int, int, int)
+    def markHighlightStale(self, position: int, removed: int, added: int):
+        self.highlightStale = True
+
+    def visibleRange(self) -> tuple[int, int]:
+        """
+        表示範囲内の段落の開始位置と終了位置を返す
+        """
+        first = self.firstVisibleBlock()
+        last = self.cursorForPosition(
+            self.viewport().rect().bottomRight()
+        ).block()
+        return first.position(), last.position() + last.length()
+
+    @Slot()
+    def updateHighlight(self):
+        if not self.highlightedMatches:
+            if self.extraSelections():
+                self.setExtraSelections([])
+            return
+        if self.highlightStale:
+            return
+
+        visibleRange = self.visibleRange()
+        if visibleRange == self.highlightedRange:
+            return
+        self.highlightedRange = visibleRange
+        start, end = visibleRange
+
+        # 一致箇所は開始位置順に並んでいるため、二分探索で表示範囲を求める
+        matches = self.highlightedMatches
+        first = matches.nextIndex(start, inclusive=False)
+        while first > 0 and matches.ends[first - 1] > start:
+            first -= 1
+        last = matches.nextIndex(end)
+
+        document = self.document()
+        selections = []
+        for index in range(first, last):
             cursor = QTextCursor(document)
-            cursor.setPosition(match.start)
-            cursor.setPosition(match.end, QTextCursor.MoveMode.KeepAnchor)
-            cursor.mergeCharFormat(highlightFormat)
+            cursor.setPosition(matches.starts[index])
+            cursor.setPosition(
+                matches.ends[index], QTextCursor.MoveMode.KeepAnchor
+            )
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = cursor
+            selection.format = self.highlightFormat
+            selections.append(selection)
+        self.setExtraSelections(selections)
 
     def focus(self, match: Match):
         self.setFocus()
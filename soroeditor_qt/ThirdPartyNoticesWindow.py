@@ -10,7 +10,7 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from . import FileOperation
+from . import FileOperation, FontCatalog
 
 
 class ThirdPartyNoticesWindow(QWidget):
@@ -37,8 +37,8 @@ class ThirdPartyNoticesWindow(QWidget):
         ]
         selectedFont = None
 
-        for family in QFontDatabase.families():
-            if family in fontCandidates:
+        for family in fontCandidates:
+            if FontCatalog.hasFamily(family):
                 selectedFont = family
                 break
 
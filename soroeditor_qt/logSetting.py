@@ -1,23 +1,85 @@
-from logging import DEBUG, Formatter, Logger, getLogger, handlers
+import atexit
+import copy
+import os
+import queue
+from logging import (
+    DEBUG,
+    INFO,
+    Formatter,
+    Logger,
+    LogRecord,
+    getLevelName,
+    getLogger,
+    handlers,
+)
 from pathlib import Path
 
+from .__version__ import __version__
+
 logPath = Path.home() / ".soroeditor" / "log"
 logPath.mkdir(parents=True, exist_ok=True)
 
+# 環境変数SOROEDITOR_LOG_LEVELで出力するログの水準を変更できる
+# 指定が無い場合、リリース版はINFO、開発版はDEBUG
+LEVELENVIRONMENT = "SOROEDITOR_LOG_LEVEL"
+DEFAULTLEVEL = INFO if __version__ != "0.0.0" else DEBUG
+
+__queueHandler: handlers.QueueHandler | None = None
+__listener: handlers.QueueListener | None = None
+
+
+class LazyQueueHandler(handlers.QueueHandler):
+    """
+    メッセージの組み立てと書き込みを書き込み用のスレッドで行うQueueHandler
+    """
+
+    def prepare(self, record: LogRecord) -> LogRecord:
+        record = copy.copy(record)
+        # 例外の情報はスレッドをまたいで保持できないため、ここで文字列にする
+        if record.exc_info:
+            record.exc_text = Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def logLevel() -> int:
+    level = os.environ.get(LEVELENVIRONMENT, "")
+    if not level:
+        return DEFAULTLEVEL
+    level = getLevelName(level.upper())
+    return level if isinstance(level, int) else DEFAULTLEVEL
+
+
+def queueHandler() -> handlers.QueueHandler:
+    """
+    すべてのロガーで共有するQueueHandlerを返す
+    最初の呼び出し時に、ファイルへ書き込むスレッドを開始する
+    """
+    global __queueHandler, __listener
+    if __queueHandler is None:
+        formater = Formatter(
+            "{asctime} {name:<30s} {levelname:<8s} {message}", style="{"
+        )
+        fileHandler = handlers.RotatingFileHandler(
+            filename=logPath / "soroeditor.log",
+            encoding="utf-8",
+            maxBytes=102400,
+            backupCount=10,
+        )
+        fileHandler.setFormatter(formater)
+        logQueue: queue.SimpleQueue = queue.SimpleQueue()
+        __queueHandler = LazyQueueHandler(logQueue)
+        __listener = handlers.QueueListener(logQueue, fileHandler)
+        __listener.start()
+        atexit.register(__listener.stop)
+    return __queueHandler
+
 
 def logSetting(name: str | None = None) -> Logger:
     logger = getLogger(name)
-    logger.setLevel(DEBUG)
-    formater = Formatter(
-        "{asctime} {name:<30s} {levelname:<8s} {message}", style="{"
-    )
-    handler = handlers.RotatingFileHandler(
-        filename=logPath / "soroeditor.log",
-        encoding="utf-8",
-        maxBytes=102400,
-        backupCount=10,
-    )
-    handler.setFormatter(formater)
-    logger.addHandler(handler)
+    logger.setLevel(logLevel())
+    handler = queueHandler()
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
 
     return logger
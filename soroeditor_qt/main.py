@@ -1,19 +1,82 @@
 import os
 import sys
+from pathlib import Path
 
-from PySide6.QtWidgets import QApplication
-
+from . import StartupProfiler
 from .logSetting import logSetting
-from .MainWindow import MainWindow
 
 logger = logSetting(__name__)
 
+SPLASHPATH = Path(__file__).parent / "src" / "splash.png"
+
 
 def main():
+    StartupProfiler.configure(sys.argv)
     logger.info("===Start Application===")
+
+    # 読み込みにかかる時間を計測できるよう、ここで読み込む
+    # 起動中のSoroEditorにファイルを渡すまでは、QtCoreとQtNetworkのみを読み込む
+    with StartupProfiler.phase("import SingleInstance"):
+        from .SingleInstance import InstanceServer, sendToRunningInstance
+
+    # 起動中のSoroEditorがあれば、ファイルを渡して終了する
+    if len(sys.argv) >= 2:
+        filePath = Path(sys.argv[-1]).absolute().as_posix()
+        with StartupProfiler.phase("sendToRunningInstance"):
+            sent = sendToRunningInstance(filePath)
+        if sent:
+            logger.info("Passed %s to the running instance", filePath)
+            StartupProfiler.finish()
+            sys.exit()
+
+    with StartupProfiler.phase("import PySide6"):
+        from PySide6.QtCore import Qt, QTimer
+        from PySide6.QtGui import QPixmap
+        from PySide6.QtWidgets import QApplication, QSplashScreen
+
     os.environ["QT_QPA_PLATFORM"] = "windows:fontengine=directwrite"
-    app = QApplication([])
-    MainWindow()
+    with StartupProfiler.phase("QApplication"):
+        app = QApplication([])
+
+    # 残りのモジュールを読み込み、ウィンドウを表示するまでスプラッシュを表示する
+    splash = None
+    if SPLASHPATH.exists():
+        with StartupProfiler.phase("splash"):
+            splash = QSplashScreen(QPixmap(SPLASHPATH))
+            splash.show()
+            app.processEvents()
+
+    with StartupProfiler.phase("import yaml"):
+        import yaml  # noqa: F401
+    with StartupProfiler.phase("import MainWindow"):
+        from . import SettingOperation
+        from .MainWindow import MainWindow, findWindow
+
+    with StartupProfiler.phase("MainWindow"):
+        windows = [MainWindow(splash)]
+
+    def openWindow(filePath: str):
+        # 既に開いているウィンドウがあれば、新しく開かずに前面に出す
+        window = findWindow(filePath)
+        if window is not None:
+            window.activateWindow()
+            window.raise_()
+            return
+        # 新しいウィンドウは設定ファイルを読み直すため、先に書き込んでおく
+        SettingOperation.flushSettingFile()
+        window = MainWindow(filePath=filePath)
+        window.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        window.destroyed.connect(lambda: windows.remove(window))
+        windows.append(window)
+        window.activateWindow()
+        window.raise_()
+
+    server = InstanceServer(app)
+    if server.listen():
+        server.openRequested.connect(openWindow)
+
+    # 最初にイベントループが処理を始めた時点で計測を終える
+    QTimer.singleShot(0, StartupProfiler.finish)
     app.exec()
     logger.info("===Close Application===")
     sys.exit()
@@ -0,0 +1,20 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# 画面を持たない環境で動かし、利用者の設定ファイルやログに触れない
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+__home = tempfile.mkdtemp(prefix="soroeditor-test-")
+os.environ["HOME"] = __home
+os.environ["USERPROFILE"] = __home
+atexit.register(shutil.rmtree, __home, ignore_errors=True)
+
+
+def application():
+    """
+    テスト全体で共有するQApplicationを返す
+    """
+    from PySide6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
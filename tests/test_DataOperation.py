@@ -0,0 +1,159 @@
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import nullcontext
+from functools import partial
+from unittest import mock
+
+import yaml
+
+from soroeditor_qt import DataOperation, SettingOperation
+
+# YAMLで引用符や書式の扱いが変わる文字列を含む本文
+TEXTS = [
+    "一行目\n二行目\n\n  字下げした行\n末尾に空白 \n\tタブ",
+    "yes\nno\nnull\n~\n1.0\n0x10\n2024-01-01\n# コメントではない\nkey: value",
+    "全角スペース　と絵文字😀と制御文字\x7fと改行\r\nの混在",
+    "",
+    None,
+]
+TITLES = ["ボックス1", "- 記号で始まる題名", "'引用符'\"", None, "空"]
+
+
+def makeData() -> dict:
+    return DataOperation.makeSaveData(
+        TEXTS, TITLES, SettingOperation.defaultSettingData()
+    )
+
+
+class PureYamlTest(unittest.TestCase):
+    def test_roundTrip(self):
+        data = makeData()
+        yml = DataOperation.dumpYaml(data, yaml.SafeDumper)
+        self.assertEqual(DataOperation.loadYaml(yml, yaml.SafeLoader), data)
+
+    def test_sameAsSafeDump(self):
+        data = makeData()
+        self.assertEqual(
+            DataOperation.dumpYaml(data, yaml.SafeDumper),
+            yaml.safe_dump(data, allow_unicode=True),
+        )
+
+
+@unittest.skipUnless(DataOperation.LIBYAML, "libyaml is not available")
+class LibyamlTest(unittest.TestCase):
+    """
+    C実装と純Python実装で入出力が一致することを確認する
+    """
+
+    def test_dump(self):
+        data = makeData()
+        self.assertEqual(
+            DataOperation.dumpYaml(data),
+            DataOperation.dumpYaml(data, yaml.SafeDumper),
+        )
+
+    def test_load(self):
+        yml = DataOperation.dumpYaml(makeData(), yaml.SafeDumper)
+        self.assertEqual(
+            DataOperation.loadYaml(yml),
+            DataOperation.loadYaml(yml, yaml.SafeLoader),
+        )
+
+    def test_roundTrip(self):
+        data = makeData()
+        self.assertEqual(
+            DataOperation.loadYaml(DataOperation.dumpYaml(data)), data
+        )
+
+
+def dumpers():
+    """
+    断片の変換に使うDumperを切り替える
+    純Python実装と、利用できる場合はC実装のそれぞれについて返す
+    """
+    yield "SafeDumper", partial(
+        mock.patch.object,
+        DataOperation,
+        "dumpYaml",
+        partial(DataOperation.dumpYaml, dumper=yaml.SafeDumper),
+    )
+    if DataOperation.LIBYAML:
+        yield "CSafeDumper", nullcontext
+
+
+class FragmentTest(unittest.TestCase):
+    """
+    断片ごとに変換したYAMLがsafe_dumpで全体を変換したものと一致する
+    """
+
+    def assertSameAsSafeDump(self, data: dict, fragments: dict):
+        self.assertEqual(
+            "".join(DataOperation.iterYamlParts(data, fragments)),
+            yaml.safe_dump(data, allow_unicode=True),
+        )
+
+    def test_fragments(self):
+        for name, patch in dumpers():
+            with self.subTest(dumper=name), patch():
+                fragments: dict = {}
+                self.assertSameAsSafeDump(makeData(), fragments)
+                self.assertEqual(sorted(fragments), [0, 1, 2, 3, 4])
+
+    def test_reuseFragments(self):
+        """
+        変更の無いボックスは変換済みの断片を使い、
+        変更したボックスのみを変換し直す
+        """
+        for name, patch in dumpers():
+            with self.subTest(dumper=name), patch():
+                fragments: dict = {}
+                list(DataOperation.iterYamlParts(makeData(), fragments))
+                cached = dict(fragments)
+
+                texts = list(TEXTS)
+                texts[1] = "変更した本文\n: コロン"
+                data = DataOperation.makeSaveData(
+                    texts, TITLES, SettingOperation.defaultSettingData()
+                )
+                del fragments[1]
+                self.assertSameAsSafeDump(data, fragments)
+                self.assertNotEqual(fragments[1], cached[1])
+                for i in (0, 2, 3, 4):
+                    self.assertIs(fragments[i], cached[i])
+
+    def test_wholeDump(self):
+        """
+        dataより前に並ぶキーがある場合やボックスが無い場合は全体を変換する
+        """
+        data = makeData()
+        data["aaa"] = 1
+        fragments: dict = {}
+        self.assertSameAsSafeDump(data, fragments)
+        self.assertEqual(fragments, {})
+        self.assertSameAsSafeDump({"data": {}, "settings": {}}, {})
+
+    def test_writeWithFragments(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        filePath = os.path.join(directory, "project.sepf")
+        fragments: dict = {}
+        data = makeData()
+        self.assertTrue(
+            DataOperation.writeProjectData(data, filePath, fragments)
+        )
+        data["data"][0]["text"] = "変更した本文"
+        del fragments[0]
+        self.assertTrue(
+            DataOperation.writeProjectData(data, filePath, fragments)
+        )
+        with open(filePath, mode="rt", encoding="utf-8") as f:
+            self.assertEqual(
+                f.read(), yaml.safe_dump(data, allow_unicode=True)
+            )
+        self.assertEqual(DataOperation.openProjectFile(filePath), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+import gzip
+import lzma
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from soroeditor_qt import DataOperation, FileOperation, SettingOperation
+
+# 圧縮形式と、書き込んだファイルの先頭にあるべきマジックナンバー
+MAGICNUMBERS = {
+    "None": b"data:",
+    "zlib": b"\x1f\x8b",
+    "lzma": b"\xfd7zXZ\x00",
+}
+TEXTS = ["本文" * 3000 + "😀\n" * 10, "短い本文", "yes: no\n" * 1000, ""]
+TITLES = ["ボックス1", "ボックス2", "ボックス3", "空"]
+
+
+def makeData(compression: str = "None") -> dict:
+    settings = SettingOperation.defaultSettingData()
+    settings["Compression"] = compression
+    return DataOperation.makeSaveData(TEXTS, TITLES, settings)
+
+
+class FileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.filePath = os.path.join(self.directory, "project.sepf")
+
+    def writeBytes(self, data: bytes):
+        with open(self.filePath, mode="wb") as f:
+            f.write(data)
+
+    def readBytes(self) -> bytes:
+        with open(self.filePath, mode="rb") as f:
+            return f.read()
+
+
+class DetectCompressionTest(FileTestCase):
+    def test_detectCompression(self):
+        cases = {
+            "zlib": gzip.compress(b"data: {}\n"),
+            "lzma": lzma.compress(b"data: {}\n"),
+            "None": b"data: {}\n",
+        }
+        for compression, data in cases.items():
+            with self.subTest(compression=compression):
+                self.writeBytes(data)
+                self.assertEqual(
+                    FileOperation.detectCompression(self.filePath),
+                    compression,
+                )
+
+    def test_noMagicNumber(self):
+        # 空のファイル、マジックナンバーの途中で終わるファイル、
+        # LZMA形式(xz以外)のファイル、存在しないファイルは圧縮されていない
+        for data in (b"", b"\x1f", b"\xfd7zX", lzma.compress(b"a", format=2)):
+            with self.subTest(data=data):
+                self.writeBytes(data)
+                self.assertEqual(
+                    FileOperation.detectCompression(self.filePath), "None"
+                )
+        self.assertEqual(
+            FileOperation.detectCompression(
+                os.path.join(self.directory, "missing.sepf")
+            ),
+            "None",
+        )
+
+
+class RoundTripTest(FileTestCase):
+    def test_roundTrip(self):
+        for compression, magic in MAGICNUMBERS.items():
+            with self.subTest(compression=compression):
+                data = makeData(compression)
+                self.assertTrue(
+                    DataOperation.writeProjectData(data, self.filePath)
+                )
+                self.assertTrue(self.readBytes().startswith(magic))
+                self.assertEqual(
+                    FileOperation.detectCompression(self.filePath),
+                    compression,
+                )
+                self.assertEqual(
+                    DataOperation.openProjectFile(self.filePath), data
+                )
+
+    def test_changeCompression(self):
+        # 上書き保存で圧縮形式を変えても、変えた後の形式で読み込める
+        for before in MAGICNUMBERS:
+            for after in MAGICNUMBERS:
+                with self.subTest(before=before, after=after):
+                    DataOperation.writeProjectData(
+                        makeData(before), self.filePath
+                    )
+                    data = makeData(after)
+                    DataOperation.writeProjectData(data, self.filePath)
+                    self.assertEqual(
+                        DataOperation.openProjectFile(self.filePath), data
+                    )
+
+    def test_textStream(self):
+        text = "本文😀\n" * 1000
+        for compression in FileOperation.COMPRESSIONS:
+            with self.subTest(compression=compression):
+                with FileOperation.atomicTextStream(
+                    self.filePath, compression
+                ) as f:
+                    f.write(text)
+                self.assertEqual(FileOperation.openFile(self.filePath), text)
+
+
+class BrokenFileTest(FileTestCase):
+    def assertNotOpened(self, message: str):
+        with self.assertLogs(DataOperation.logger, "ERROR"):
+            self.assertEqual(
+                DataOperation.openProjectFile(self.filePath), {}, message
+            )
+
+    def test_truncated(self):
+        for compression in ("zlib", "lzma"):
+            DataOperation.writeProjectData(
+                makeData(compression), self.filePath
+            )
+            raw = self.readBytes()
+            for length in (len(MAGICNUMBERS[compression]), len(raw) // 2):
+                with self.subTest(compression=compression, length=length):
+                    self.writeBytes(raw[:length])
+                    self.assertNotOpened(f"{compression} {length}")
+
+    def test_corruptHeader(self):
+        # gzipのヘッダーの圧縮方式や、展開後のデータの一部を壊す
+        DataOperation.writeProjectData(makeData("zlib"), self.filePath)
+        raw = bytearray(self.readBytes())
+        for position in (2, 10, 11):
+            with self.subTest(position=position):
+                broken = raw.copy()
+                broken[position] ^= 0xFF
+                self.writeBytes(bytes(broken))
+                self.assertNotOpened(str(position))
+
+    def test_notProjectData(self):
+        # 正しく展開できても、プロジェクトのデータでなければ読み込まない
+        for compression in FileOperation.COMPRESSIONS:
+            for text in ("本文だけ", "data: 本文", "data:\n  0: 本文"):
+                with self.subTest(compression=compression, text=text):
+                    with FileOperation.atomicTextStream(
+                        self.filePath, compression
+                    ) as f:
+                        f.write(text)
+                    self.assertNotOpened(text)
+
+    def test_randomCorruption(self):
+        # 壊れたファイルは例外を出さず、プロジェクトのデータか{}を返す
+        generator = random.Random(0)
+        for compression in FileOperation.COMPRESSIONS:
+            DataOperation.writeProjectData(
+                makeData(compression), self.filePath
+            )
+            raw = self.readBytes()
+            for trial in range(100):
+                broken = bytearray(raw)
+                if generator.random() < 0.3:
+                    length = generator.randrange(len(broken))
+                    del broken[length:]
+                else:
+                    for _ in range(generator.randrange(1, 4)):
+                        position = generator.randrange(min(len(broken), 200))
+                        broken[position] = generator.randrange(256)
+                self.writeBytes(bytes(broken))
+                with self.subTest(compression=compression, trial=trial):
+                    data = DataOperation.openProjectFile(self.filePath)
+                    self.assertTrue(
+                        data == {} or DataOperation.isProjectData(data)
+                    )
+
+
+class AtomicWriteTest(FileTestCase):
+    def test_failedWrite(self):
+        # 書き込み中に失敗しても元のファイルは残り、一時ファイルも残らない
+        for compression in FileOperation.COMPRESSIONS:
+            with self.subTest(compression=compression):
+                self.writeBytes(b"original")
+                with self.assertRaises(RuntimeError):
+                    with FileOperation.atomicTextStream(
+                        self.filePath, compression
+                    ) as f:
+                        f.write("new")
+                        raise RuntimeError
+                self.assertEqual(self.readBytes(), b"original")
+                self.assertEqual(os.listdir(self.directory), ["project.sepf"])
+
+    def test_permission(self):
+        # 上書きしても元のファイルの権限を引き継ぐ
+        self.writeBytes(b"original")
+        os.chmod(self.filePath, 0o600)
+        self.assertTrue(FileOperation.writeToFile("new", self.filePath))
+        self.assertEqual(os.stat(self.filePath).st_mode & 0o777, 0o600)
+        self.assertEqual(self.readBytes(), b"new")
+
+
+if __name__ == "__main__":
+    unittest.main()
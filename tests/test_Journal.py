@@ -0,0 +1,134 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from PySide6.QtCore import QCoreApplication
+from PySide6.QtGui import QTextCursor
+
+from soroeditor_qt import DataOperation
+from soroeditor_qt.Journal import journalPath, replayJournal
+
+from . import application
+
+# サロゲートペアになる文字と、改行以外の行区切りを含む
+CHARACTERS = ["a", "あ", "\n", "😀", "𠮷", "\x85"]
+
+
+def setUpModule():
+    application()
+
+
+def utf16Length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        from soroeditor_qt.MainWindow import MainWindow
+
+        self.directory = tempfile.mkdtemp()
+        self.filePath = os.path.join(self.directory, "project.sepf")
+        self.window = MainWindow()
+        self.textEdits = self.window.textEditor.textEdits
+        self.random = random.Random(0)
+        for textEdit, text in zip(self.textEdits, ["", "😀a\n", "𠮷\n\n"]):
+            textEdit.setPlainText(text)
+        self.assertTrue(
+            self.window.startSave(self.filePath, saveAs=True, wait=True)
+        )
+
+    def tearDown(self):
+        self.window.markAsSaved()
+        self.window.close()
+        self.window.deleteLater()
+        QCoreApplication.sendPostedEvents()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def edit(self):
+        """
+        文字の境界の間を選択して置き換える、取り消す、やり直す、
+        スクロール用の改行を追加する、のいずれかを行う
+        """
+        textEdit = self.random.choice(self.textEdits)
+        operation = self.random.random()
+        if operation < 0.1:
+            textEdit.undo()
+            return
+        if operation < 0.15:
+            textEdit.redo()
+            return
+        if operation < 0.2:
+            self.window.textEditor.appendPadding(textEdit, "\n")
+            return
+        text = textEdit.toPlainText()
+        start = self.random.randrange(len(text) + 1)
+        end = min(len(text), start + self.random.randrange(4))
+        cursor = QTextCursor(textEdit.document())
+        cursor.setPosition(utf16Length(text[:start]))
+        cursor.setPosition(
+            utf16Length(text[:end]), QTextCursor.MoveMode.KeepAnchor
+        )
+        cursor.insertText(
+            "".join(
+                self.random.choice(CHARACTERS)
+                for _ in range(self.random.randrange(4))
+            )
+        )
+
+    def edits(self, count: int = 100):
+        for _ in range(count):
+            self.edit()
+
+    def assertReplayed(self):
+        """
+        保存したファイルに編集記録を適用した結果が現在の文章と一致する
+        """
+        self.window.journal.flush()
+        data = DataOperation.openProjectFile(self.filePath)["data"]
+        recovered = replayJournal(data, self.filePath)
+        self.assertIsNotNone(recovered)
+        self.assertEqual(
+            [recovered[i]["text"] for i in range(len(self.textEdits))],
+            [textEdit.toPlainText() for textEdit in self.textEdits],
+        )
+
+    def test_edits(self):
+        self.edits()
+        self.assertReplayed()
+
+    def test_editsAfterSave(self):
+        self.edits()
+        self.assertTrue(self.window.saveFile(wait=True))
+        self.edits()
+        self.assertReplayed()
+
+    def test_editsDuringSave(self):
+        """
+        保存中の編集は、保存した内容を基点とする記録に引き継がれる
+        """
+        self.edits()
+        self.assertTrue(self.window.startSave(self.filePath))
+        self.edits(30)
+        self.window.waitForSaves()
+        self.edits(30)
+        self.assertReplayed()
+
+    def test_noEditsAfterSave(self):
+        self.edits()
+        self.window.journal.flush()
+        self.assertTrue(self.window.saveFile(wait=True))
+        self.assertFalse(os.path.exists(journalPath(self.filePath)))
+
+    def test_titles(self):
+        self.window.textEditor.lineEdits[1].setText("題名😀")
+        self.edits(10)
+        self.assertReplayed()
+        data = DataOperation.openProjectFile(self.filePath)["data"]
+        recovered = replayJournal(data, self.filePath)
+        self.assertEqual(recovered[1]["title"], "題名😀")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from PySide6.QtCore import QCoreApplication
+
+from . import application
+
+
+def setUpModule():
+    application()
+
+
+class OpenedFileTest(unittest.TestCase):
+    """
+    同じファイルは一つのウィンドウでのみ開く
+    """
+
+    def setUp(self):
+        from soroeditor_qt.MainWindow import MainWindow
+
+        self.directory = tempfile.mkdtemp()
+        self.filePath = os.path.join(self.directory, "project.sepf")
+        self.first = MainWindow()
+        self.first.textEditor.textEdits[0].setPlainText("first")
+        self.assertTrue(
+            self.first.startSave(self.filePath, saveAs=True, wait=True)
+        )
+        self.second = MainWindow()
+        patcher = mock.patch(
+            "soroeditor_qt.MainWindow.QMessageBox.information"
+        )
+        self.information = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        for window in (self.first, self.second):
+            window.markAsSaved()
+            window.close()
+            window.deleteLater()
+        QCoreApplication.sendPostedEvents()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_findWindow(self):
+        from soroeditor_qt.MainWindow import findWindow
+
+        self.assertIs(findWindow(self.filePath), self.first)
+        self.assertIsNone(findWindow(self.filePath, exclude=self.first))
+        self.first.markAsSaved()
+        self.first.close()
+        self.assertIsNone(findWindow(self.filePath))
+
+    def test_openRefused(self):
+        self.assertFalse(self.second.openProjectFile(self.filePath))
+        self.information.assert_called_once()
+        self.assertEqual(self.second.currentFilePath, "")
+        # スクロール用の改行のみが残る
+        text = self.second.textEditor.textEdits[0].toPlainText()
+        self.assertEqual(text.strip("\n"), "")
+
+    def test_saveAsRefused(self):
+        with mock.patch(
+            "soroeditor_qt.MainWindow.QFileDialog.getSaveFileName",
+            return_value=(self.filePath, ""),
+        ):
+            self.assertFalse(self.second.saveFileAs(wait=True))
+        self.information.assert_called_once()
+        self.assertEqual(self.second.currentFilePath, "")
+
+    def test_openAfterClose(self):
+        self.first.markAsSaved()
+        self.first.close()
+        self.assertTrue(self.second.openProjectFile(self.filePath))
+        self.information.assert_not_called()
+
+
+class FragmentCacheTest(unittest.TestCase):
+    """
+    保存のたびに変換済みの断片を使い回しても、全体を変換した場合と
+    同じ内容を書き込む
+    """
+
+    def setUp(self):
+        from soroeditor_qt.MainWindow import MainWindow
+
+        self.directory = tempfile.mkdtemp()
+        self.filePath = os.path.join(self.directory, "project.sepf")
+        self.window = MainWindow()
+        for i, textEdit in enumerate(self.window.textEditor.textEdits):
+            textEdit.setPlainText(f"本文{i}\nyes: no\n")
+
+    def tearDown(self):
+        self.window.markAsSaved()
+        self.window.close()
+        self.window.deleteLater()
+        QCoreApplication.sendPostedEvents()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def assertSaved(self):
+        import yaml
+
+        from soroeditor_qt import DataOperation
+
+        textEditor = self.window.textEditor
+        data = DataOperation.makeSaveData(
+            textEditor.getAllCurrentText(),
+            textEditor.getAllCurrentTitle(),
+            self.window.projectSetting.data(),
+        )
+        with open(self.filePath, mode="rt", encoding="utf-8") as f:
+            self.assertEqual(
+                f.read(), yaml.safe_dump(data, allow_unicode=True)
+            )
+
+    def test_editOneBox(self):
+        textEditor = self.window.textEditor
+        self.assertTrue(
+            self.window.startSave(self.filePath, saveAs=True, wait=True)
+        )
+        self.assertSaved()
+        cached = {
+            i: fragment
+            for i, (_, fragment) in self.window.fragmentCache.items()
+        }
+
+        textEditor.textEdits[1].insertPlainText("追記")
+        textEditor.lineEdits[2].setText("新しい題名")
+        self.assertTrue(self.window.saveFile(wait=True))
+        self.assertSaved()
+        fragments = {
+            i: fragment
+            for i, (_, fragment) in self.window.fragmentCache.items()
+        }
+        self.assertIs(fragments[0], cached[0])
+        self.assertNotEqual(fragments[1], cached[1])
+        self.assertNotEqual(fragments[2], cached[2])
+
+        # 取り消した場合も変換し直す
+        textEditor.textEdits[1].undo()
+        self.assertTrue(self.window.saveFile(wait=True))
+        self.assertSaved()
+
+
+class StartupImportTest(unittest.TestCase):
+    def test_sendWithoutGui(self):
+        """
+        起動中のSoroEditorにファイルを渡して終了するまでに、
+        GUIのモジュールを読み込まない
+        """
+        code = (
+            "import sys\n"
+            "from unittest import mock\n"
+            "from soroeditor_qt import main\n"
+            "sys.argv = ['soroeditor', 'project.sepf']\n"
+            "with mock.patch(\n"
+            "    'soroeditor_qt.SingleInstance.sendToRunningInstance',\n"
+            "    return_value=True,\n"
+            "):\n"
+            "    try:\n"
+            "        main.main()\n"
+            "    except SystemExit:\n"
+            "        pass\n"
+            "print(sorted(name for name in sys.modules\n"
+            "    if name in ('PySide6.QtGui', 'PySide6.QtWidgets')))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.dirname(__file__)),
+            check=True,
+        )
+        self.assertEqual(result.stdout.strip(), "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
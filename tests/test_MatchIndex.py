@@ -0,0 +1,154 @@
+import random
+import re
+import unittest
+
+from PySide6.QtGui import QTextCursor, QTextDocument
+from PySide6.QtWidgets import QPlainTextDocumentLayout
+
+from soroeditor_qt.MatchIndex import MatchIndex
+from soroeditor_qt.SearchOperation import MatchSet
+
+from . import application
+from .test_SearchOperation import BLOCKLOCALPATTERNS, WHOLEDOCUMENTPATTERNS
+
+TEXT = "abc ab\n\nab c\tabc\n a-b ]\n" * 3 + "xyz abc"
+
+
+def setUpModule():
+    application()
+
+
+def makeDocument() -> QTextDocument:
+    """
+    PlainTextEditと同じく、レイアウトを持つ文書を作る
+    レイアウトが無い文書はcontentsChangeを送出しない
+    """
+    document = QTextDocument()
+    document.setDocumentLayout(QPlainTextDocumentLayout(document))
+    document.setPlainText(TEXT)
+    return document
+
+
+def expectedSpans(document: QTextDocument, pattern: str, regex: bool):
+    text = document.toPlainText()
+    if regex:
+        return [m.span() for m in re.finditer(pattern, text)]
+    return [
+        (m.start(), m.start() + len(pattern))
+        for m in re.finditer(f"(?={re.escape(pattern)})", text)
+    ]
+
+
+def indexSpans(index: MatchIndex):
+    index.waitForReady()
+    starts, ends = index.positions()
+    return list(zip(starts, ends))
+
+
+class MatchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.document = makeDocument()
+        self.index = MatchIndex(self.document)
+
+    def assertMatches(self, pattern: str, regex: bool):
+        self.assertEqual(
+            indexSpans(self.index),
+            expectedSpans(self.document, pattern, regex),
+        )
+
+    def edit(self, generator: random.Random):
+        length = self.document.characterCount() - 1
+        cursor = QTextCursor(self.document)
+        start = generator.randrange(length + 1)
+        cursor.setPosition(start)
+        end = min(length, start + generator.randrange(6))
+        cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        cursor.insertText(
+            "".join(
+                generator.choice("abc \n\t-")
+                for _ in range(generator.randrange(6))
+            )
+        )
+
+    def test_patterns(self):
+        patterns = [(p, True) for p in BLOCKLOCALPATTERNS]
+        patterns += [(p, True) for p in WHOLEDOCUMENTPATTERNS]
+        patterns += [("ab", False), ("c\na", False)]
+        for pattern, regex in patterns:
+            with self.subTest(pattern=pattern, regex=regex):
+                self.index.setPattern(pattern, regex)
+                self.assertMatches(pattern, regex)
+
+    def test_incrementalEdits(self):
+        generator = random.Random(0)
+        patterns = ["ab", "a*", "[a-c]+", "^a", "c$", r"\s", r"[\x00-\x20]"]
+        for pattern in patterns:
+            self.index.setPattern(pattern, True)
+            with self.subTest(pattern=pattern):
+                for _ in range(30):
+                    self.edit(generator)
+                    self.assertMatches(pattern, True)
+        self.index.setPattern("b c", False)
+        for _ in range(30):
+            self.edit(generator)
+            self.assertMatches("b c", False)
+
+    def test_undo(self):
+        self.index.setPattern("ab", False)
+        expected = indexSpans(self.index)
+        cursor = QTextCursor(self.document)
+        cursor.beginEditBlock()
+        cursor.insertText("ab\nab\n")
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText("\nab")
+        cursor.endEditBlock()
+        self.assertMatches("ab", False)
+        self.document.undo()
+        self.assertEqual(indexSpans(self.index), expected)
+
+    def test_inactive(self):
+        self.index.setPattern("(", True)
+        self.assertFalse(self.index.isActive())
+        self.assertEqual(self.index.count(), 0)
+        self.assertEqual(indexSpans(self.index), [])
+
+
+class MatchPositionsTest(unittest.TestCase):
+    def setUp(self):
+        self.document = makeDocument()
+        self.index = MatchIndex(self.document)
+        self.index.setPattern("ab", False)
+        self.index.waitForReady()
+        self.expected = expectedSpans(self.document, "ab", False)
+
+    def test_sequence(self):
+        starts, ends = self.index.positions()
+        self.assertEqual(len(starts), len(self.expected))
+        self.assertEqual(starts[-1], self.expected[-1][0])
+        self.assertEqual(ends[1:3], [span[1] for span in self.expected[1:3]])
+        with self.assertRaises(IndexError):
+            starts[len(self.expected)]
+
+    def test_followsEdits(self):
+        """
+        段落数が変わらない編集の後も、作り直さずに現在の位置を返す
+        """
+        starts, ends = self.index.positions()
+        cursor = QTextCursor(self.document)
+        cursor.insertText("xx")
+        self.assertEqual(
+            list(zip(starts, ends)),
+            expectedSpans(self.document, "ab", False),
+        )
+
+    def test_matchSet(self):
+        starts, ends = self.index.positions()
+        matchSet = MatchSet(0, starts, ends)
+        position = self.expected[2][0]
+        self.assertEqual(matchSet.nextIndex(position), 2)
+        self.assertEqual(matchSet.nextIndex(position, inclusive=False), 3)
+        self.assertEqual(matchSet.previousIndex(position), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from PySide6.QtCore import QCoreApplication
+from PySide6.QtGui import QTextCursor
+
+from soroeditor_qt import DataOperation
+from soroeditor_qt.Journal import journalPath, replayJournal
+
+from . import application
+
+# 読み込みが何回にも分かれる大きさの本文
+TEXTS = [
+    "".join(f"{i}行目の本文ab\n" for i in range(20000)),
+    "短い本文ab",
+    "ab😀\n" * 30000,
+]
+
+
+def setUpModule():
+    application()
+
+
+class ProgressiveLoaderTest(unittest.TestCase):
+    def setUp(self):
+        from soroeditor_qt.MainWindow import MainWindow
+
+        self.directory = tempfile.mkdtemp()
+        self.filePath = os.path.join(self.directory, "project.sepf")
+        self.window = MainWindow()
+        self.textEditor = self.window.textEditor
+        self.textEdits = self.textEditor.textEdits
+        for textEdit, text in zip(self.textEdits, TEXTS):
+            textEdit.setPlainText(text)
+        self.assertTrue(
+            self.window.startSave(self.filePath, saveAs=True, wait=True)
+        )
+        self.window.markAsSaved()
+        self.assertTrue(self.window.openProjectFile(self.filePath))
+        self.assertTrue(self.textEditor.isLoading())
+
+    def tearDown(self):
+        self.window.markAsSaved()
+        self.window.close()
+        self.window.deleteLater()
+        QCoreApplication.sendPostedEvents()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def texts(self) -> list[str]:
+        return [
+            textEdit.toPlainText().rstrip("\n") for textEdit in self.textEdits
+        ]
+
+    def waitForLoading(self):
+        while self.textEditor.isLoading():
+            QCoreApplication.processEvents()
+
+    def insertText(self, box: int, position: int, text: str):
+        cursor = QTextCursor(self.textEdits[box].document())
+        cursor.setPosition(position)
+        cursor.insertText(text)
+
+    def test_load(self):
+        self.assertLess(len(self.textEdits[0].toPlainText()), len(TEXTS[0]))
+        self.waitForLoading()
+        self.assertEqual(self.texts(), [text.rstrip("\n") for text in TEXTS])
+        self.assertFalse(self.textEditor.isModified())
+        self.assertFalse(self.window.isDataChanged())
+        for textEdit in self.textEdits:
+            self.assertTrue(textEdit.document().isUndoRedoEnabled())
+
+    def test_editWhileLoading(self):
+        # 読み込み済みの部分の先頭と途中を編集しても、残りはその後ろに続く
+        QCoreApplication.processEvents()
+        self.assertTrue(self.textEditor.isLoading())
+        self.insertText(0, 0, "先頭")
+        self.insertText(2, 4, "途中")
+        self.waitForLoading()
+        expected = [text.rstrip("\n") for text in TEXTS]
+        expected[0] = "先頭" + expected[0]
+        expected[2] = expected[2][:3] + "途中" + expected[2][3:]
+        self.assertEqual(self.texts(), expected)
+        self.assertTrue(self.textEditor.isModified())
+
+        # 読み込み中の編集も編集記録から復元できる
+        self.window.journal.flush()
+        data = DataOperation.openProjectFile(self.filePath)["data"]
+        recovered = replayJournal(data, self.filePath)
+        self.assertIsNotNone(recovered)
+        self.assertEqual(
+            [recovered[i]["text"].rstrip("\n") for i in recovered], expected
+        )
+
+    def test_finishLoading(self):
+        self.insertText(1, 0, "先頭")
+        self.textEditor.finishLoading()
+        self.assertFalse(self.textEditor.isLoading())
+        self.assertEqual(self.texts()[0], TEXTS[0].rstrip("\n"))
+        self.assertEqual(self.texts()[1], "先頭" + TEXTS[1])
+        self.assertTrue(self.textEditor.isModified())
+
+    def test_saveWhileLoading(self):
+        # 保存は残りをすべて読み込んでから行う
+        self.insertText(0, 0, "先頭")
+        self.assertTrue(self.window.startSave(self.filePath, wait=True))
+        self.assertFalse(self.textEditor.isLoading())
+        self.assertFalse(self.window.isDataChanged())
+        data = DataOperation.openProjectFile(self.filePath)["data"]
+        self.assertEqual(data[0]["text"], "先頭" + TEXTS[0].rstrip("\n"))
+        self.assertEqual(data[2]["text"], TEXTS[2].rstrip("\n"))
+        self.assertFalse(os.path.exists(journalPath(self.filePath)))
+
+    def test_searchWhileLoading(self):
+        # 読み込み中に検索しても、後から読み込んだ部分の一致を数える
+        self.window.qAction["search"]["Search"].trigger()
+        searchWindow = self.window.subWindows["SearchWindow"]
+        searchWindow.searchInput.setText("ab")
+        searchWindow.reset(wait=True)
+        self.assertLess(
+            searchWindow.matchCount(), sum(text.count("ab") for text in TEXTS)
+        )
+        self.waitForLoading()
+        self.assertEqual(
+            searchWindow.matchCount(), sum(text.count("ab") for text in TEXTS)
+        )
+        searchWindow.close()
+
+    def test_cancelLoading(self):
+        loaded = self.texts()
+        self.textEditor.cancelLoading()
+        self.assertFalse(self.textEditor.isLoading())
+        QCoreApplication.processEvents()
+        self.assertEqual(self.texts(), loaded)
+        for textEdit in self.textEdits:
+            self.assertTrue(textEdit.document().isUndoRedoEnabled())
+
+    def test_openWhileLoading(self):
+        # 読み込み中に別のファイルを開くと、前の読み込みは中断される
+        otherPath = os.path.join(self.directory, "other.sepf")
+        data = DataOperation.openProjectFile(self.filePath)
+        for box in data["data"].values():
+            box["text"] = "別のファイル"
+        self.assertTrue(DataOperation.writeProjectData(data, otherPath))
+        with mock.patch(
+            "soroeditor_qt.MainWindow.QMessageBox.information"
+        ) as information:
+            self.assertTrue(self.window.openProjectFile(otherPath))
+        information.assert_not_called()
+        self.waitForLoading()
+        self.assertEqual(self.texts(), ["別のファイル"] * 3)
+        self.assertEqual(self.window.currentFilePath, otherPath)
+        self.assertFalse(self.window.isDataChanged())
+
+
+if __name__ == "__main__":
+    unittest.main()
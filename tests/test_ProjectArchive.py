@@ -0,0 +1,182 @@
+import os
+import random
+import shutil
+import struct
+import tempfile
+import unittest
+
+from soroeditor_qt import DataOperation, ProjectArchive, SettingOperation
+
+# 圧縮する大きさの本文と、圧縮しない大きさの本文
+TEXTS = ["本文😀\n" * 2000, "短い本文", "", None]
+TITLES = ["ボックス1", None, "空", "無し"]
+COMPRESSIONS = ("None", *ProjectArchive.COMPRESSORS)
+
+
+def makeData(compression: str = "None") -> dict:
+    settings = SettingOperation.defaultSettingData()
+    settings["Compression"] = compression
+    return DataOperation.makeSaveData(TEXTS, TITLES, settings)
+
+
+class ArchiveTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.filePath = os.path.join(self.directory, "project.sepb")
+
+    def writeBytes(self, data: bytes):
+        with open(self.filePath, mode="wb") as f:
+            f.write(data)
+
+
+class RoundTripTest(ArchiveTestCase):
+    def test_roundTrip(self):
+        for compression in COMPRESSIONS:
+            with self.subTest(compression=compression):
+                data = makeData(compression)
+                self.assertTrue(
+                    DataOperation.writeProjectData(data, self.filePath)
+                )
+                self.assertTrue(ProjectArchive.isArchive(self.filePath))
+                self.assertEqual(
+                    DataOperation.openProjectFile(self.filePath), data
+                )
+
+    def test_sectionCompression(self):
+        """
+        一定以上の大きさのセクションのみを指定した方式で圧縮する
+        """
+        methods = {
+            "None": ProjectArchive.COMPRESSION_NONE,
+            "zlib": ProjectArchive.COMPRESSION_ZLIB,
+            "lzma": ProjectArchive.COMPRESSION_LZMA,
+        }
+        for compression in COMPRESSIONS:
+            with self.subTest(compression=compression):
+                self.writeBytes(
+                    DataOperation.makeDataToBinary(
+                        makeData(compression), compression
+                    )
+                )
+                with ProjectArchive.ProjectArchive(self.filePath) as archive:
+                    self.assertEqual(
+                        archive.sections["text/0"][2], methods[compression]
+                    )
+                    self.assertEqual(
+                        archive.sections["text/1"][2],
+                        ProjectArchive.COMPRESSION_NONE,
+                    )
+                    self.assertEqual(archive.text(0), TEXTS[0].rstrip("\n"))
+                    self.assertFalse(archive.hasText(3))
+
+    def test_partialRead(self):
+        data = makeData("zlib")
+        DataOperation.writeProjectData(data, self.filePath)
+        metadata = DataOperation.openBinaryProjectFile(
+            self.filePath, metadataOnly=True
+        )
+        self.assertEqual(metadata["settings"], data["settings"])
+        self.assertNotIn("text", metadata["data"][0])
+        self.assertEqual(metadata["data"][0]["title"], "ボックス1")
+
+        partial = DataOperation.openBinaryProjectFile(self.filePath, boxes=[1])
+        self.assertNotIn("text", partial["data"][0])
+        self.assertEqual(partial["data"][1]["text"], "短い本文")
+
+    def test_isArchive(self):
+        self.writeBytes(b"data:\n")
+        self.assertFalse(ProjectArchive.isArchive(self.filePath))
+        self.assertFalse(
+            ProjectArchive.isArchive(os.path.join(self.directory, "none"))
+        )
+        self.writeBytes(ProjectArchive.MAGIC)
+        self.assertTrue(ProjectArchive.isArchive(self.filePath))
+
+
+class BrokenArchiveTest(ArchiveTestCase):
+    """
+    壊れたファイルは例外を送出せず、空のデータとして読み込む
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.archive = DataOperation.makeDataToBinary(makeData(), "zlib")
+
+    def assertBroken(self, data: bytes):
+        self.writeBytes(data)
+        self.assertEqual(DataOperation.openProjectFile(self.filePath), {})
+        self.assertEqual(
+            DataOperation.openBinaryProjectFile(self.filePath), {}
+        )
+
+    def sectionOffset(self, name: str) -> int:
+        with ProjectArchive.ProjectArchive(self.filePath) as archive:
+            return archive.sections[name][0]
+
+    def test_truncated(self):
+        header = ProjectArchive.HEADER.size
+        for length in (len(ProjectArchive.MAGIC), header, header + 10):
+            with self.subTest(length=length):
+                self.assertBroken(self.archive[:length])
+        self.assertBroken(self.archive[:-1])
+
+    def test_newerVersion(self):
+        _, _, count = ProjectArchive.HEADER.unpack_from(self.archive)
+        header = ProjectArchive.HEADER.pack(
+            ProjectArchive.MAGIC, ProjectArchive.VERSION + 1, count
+        )
+        size = ProjectArchive.HEADER.size
+        self.assertBroken(header + self.archive[size:])
+
+    def test_corruptSection(self):
+        self.writeBytes(self.archive)
+        start = self.sectionOffset("text/0") + 10
+        end = start + 10
+        broken = bytearray(self.archive)
+        broken[start:end] = b"\xff" * 10
+        self.assertBroken(bytes(broken))
+
+    def test_brokenMetadata(self):
+        for metadata in ("just a string", "data: 1", "data:\n  0: text\n"):
+            with self.subTest(metadata=metadata):
+                self.assertBroken(ProjectArchive.dumpArchive(metadata, {}))
+
+    def test_brokenIndex(self):
+        broken = bytearray(self.archive)
+        # 最初のセクション名をUTF-8として不正なバイト列にする
+        position = ProjectArchive.HEADER.size + ProjectArchive.NAMELENGTH.size
+        broken[position] = 0xFF
+        self.assertBroken(bytes(broken))
+
+    def test_randomCorruption(self):
+        generator = random.Random(0)
+        for _ in range(200):
+            broken = bytearray(self.archive)
+            if generator.random() < 0.5:
+                broken = broken[: generator.randrange(len(broken))]
+            else:
+                for _ in range(generator.randrange(1, 4)):
+                    broken[generator.randrange(len(broken))] = (
+                        generator.randrange(256)
+                    )
+            self.writeBytes(bytes(broken))
+            result = DataOperation.openProjectFile(self.filePath)
+            self.assertIsInstance(result, dict)
+
+
+class DumpArchiveTest(unittest.TestCase):
+    def test_layout(self):
+        archive = ProjectArchive.dumpArchive("a: 1\n", {0: "本文"})
+        magic, version, count = ProjectArchive.HEADER.unpack_from(archive)
+        self.assertEqual(
+            (magic, version, count),
+            (ProjectArchive.MAGIC, ProjectArchive.VERSION, 2),
+        )
+        self.assertTrue(archive.endswith("a: 1\n本文".encode("utf-8")))
+        with self.assertRaises(struct.error):
+            ProjectArchive.HEADER.unpack_from(archive[:4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+import random
+import re
+import unittest
+
+from soroeditor_qt.SearchOperation import (
+    AhoCorasick,
+    FenwickTree,
+    MatchSet,
+    findSpans,
+    isBlockLocal,
+)
+
+# 段落ごとに検索すると結果が変わりうる正規表現
+WHOLEDOCUMENTPATTERNS = [
+    "^abc",
+    "abc$",
+    "^",
+    "$",
+    r"\Aabc",
+    r"c\Z",
+    r"\bab",
+    r"ab\B",
+    r"\s",
+    r"\W+",
+    r"\D",
+    r"a\nb",
+    r"\x0a",
+    r"\012",
+    r"[\x00-\x20]",
+    r"[\x00-\x7f]+",
+    "[^a]",
+    r"[^\S]",
+    r"[\s]",
+    "[\t-\r]",
+    r"(?s)a.b",
+    r"(?m)^a",
+    "a(?=b)",
+    "(?<=a)b",
+    r"(a)\1",
+    "a\nb",
+]
+
+# 段落ごとに検索しても結果が変わらない正規表現
+BLOCKLOCALPATTERNS = [
+    "abc",
+    "a.c",
+    "a*",
+    "b+?",
+    "(?:ab|c){1,2}",
+    "(?P<x>a)b",
+    r"\d\w\S",
+    r"a\.b\t",
+    "[a-c]+",
+    "[]a]",
+    "[a-]",
+    r"[\-\]]",
+    "[!-~]",
+]
+
+
+class IsBlockLocalTest(unittest.TestCase):
+    def test_wholeDocument(self):
+        for pattern in WHOLEDOCUMENTPATTERNS:
+            with self.subTest(pattern=pattern):
+                self.assertFalse(isBlockLocal(pattern, True))
+
+    def test_blockLocal(self):
+        for pattern in BLOCKLOCALPATTERNS:
+            with self.subTest(pattern=pattern):
+                self.assertTrue(isBlockLocal(pattern, True))
+
+    def test_plainText(self):
+        self.assertTrue(isBlockLocal("^a$", False))
+        self.assertFalse(isBlockLocal("a\nb", False))
+
+    def test_sameAsWholeDocument(self):
+        """
+        段落ごとに検索した結果が文書全体を検索した結果と一致する
+        """
+        generator = random.Random(0)
+        for pattern in BLOCKLOCALPATTERNS:
+            compiled = re.compile(pattern)
+            for _ in range(50):
+                text = "".join(
+                    generator.choice("abc .-]\t1\n") for _ in range(40)
+                )
+                expected = [m.span() for m in compiled.finditer(text)]
+                spans = []
+                position = 0
+                for line in text.split("\n"):
+                    found = findSpans(line, compiled)
+                    spans += [
+                        (position + found[i], position + found[i + 1])
+                        for i in range(0, len(found), 2)
+                    ]
+                    position += len(line) + 1
+                with self.subTest(pattern=pattern, text=text):
+                    self.assertEqual(spans, expected)
+
+
+class FindSpansTest(unittest.TestCase):
+    def test_plainTextOverlaps(self):
+        self.assertEqual(list(findSpans("aaaa", "aa")), [0, 2, 1, 3, 2, 4])
+
+    def test_regex(self):
+        spans = findSpans("ab ab", re.compile("b"))
+        self.assertEqual(list(spans), [1, 2, 4, 5])
+
+
+class FenwickTreeTest(unittest.TestCase):
+    def test_randomUpdates(self):
+        generator = random.Random(0)
+        values = [generator.randrange(4) for _ in range(100)]
+        tree = FenwickTree(values)
+        for _ in range(200):
+            index = generator.randrange(len(values))
+            delta = generator.randrange(-values[index], 4)
+            values[index] += delta
+            tree.add(index, delta)
+            total = sum(values)
+            self.assertEqual(tree.total(), total)
+            for i in range(0, len(values) + 1, 7):
+                self.assertEqual(tree.prefixSum(i), sum(values[:i]))
+            if total:
+                k = generator.randrange(total)
+                i = tree.find(k)
+                self.assertLessEqual(sum(values[:i]), k)
+                self.assertLess(k, sum(values[: i + 1]))
+
+    def test_findBeyondTotal(self):
+        tree = FenwickTree([1, 0, 2])
+        self.assertEqual(tree.find(3), 3)
+        self.assertEqual(len(FenwickTree()), 0)
+
+
+class AhoCorasickTest(unittest.TestCase):
+    def test_sameAsFind(self):
+        generator = random.Random(0)
+        for _ in range(100):
+            terms = [
+                "".join(generator.choice("abc") for _ in range(length))
+                for length in generator.choices(range(1, 4), k=3)
+            ]
+            text = "".join(generator.choice("abc") for _ in range(30))
+            matchSet, counts = AhoCorasick(terms).search(text, 0)
+
+            uniqueTerms = list(dict.fromkeys(terms))
+            expected = []
+            expectedCounts = []
+            for term in uniqueTerms:
+                spans = [
+                    (m.start(), m.start() + len(term))
+                    for m in re.finditer(f"(?={re.escape(term)})", text)
+                ]
+                expected += spans
+                expectedCounts.append(len(spans))
+            self.assertEqual(list(matchSet.spans()), sorted(expected))
+            self.assertEqual(counts, expectedCounts)
+
+    def test_ignoresEmptyTerms(self):
+        automaton = AhoCorasick(["", "a", "a"])
+        self.assertEqual(automaton.terms, ["a"])
+
+
+class MatchSetTest(unittest.TestCase):
+    def test_nextAndPreviousIndex(self):
+        matchSet = MatchSet(0, [1, 4, 4, 9], [2, 5, 6, 10])
+        self.assertEqual(matchSet.nextIndex(4), 1)
+        self.assertEqual(matchSet.nextIndex(4, inclusive=False), 3)
+        self.assertEqual(matchSet.nextIndex(10), 4)
+        self.assertEqual(matchSet.previousIndex(4), 0)
+        self.assertEqual(matchSet.previousIndex(1), -1)
+
+    def test_textSource(self):
+        text = "abcabc"
+        matchSet = MatchSet(2, [1, 4], [3, 6], lambda s, e: text[s:e])
+        self.assertEqual(
+            [(m.start, m.end, m.group, m.box) for m in matchSet],
+            [(1, 3, "bc", 2), (4, 6, "bc", 2)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from PySide6.QtCore import QCoreApplication
+
+from . import application
+
+
+def setUpModule():
+    application()
+
+
+class SearchWindowTest(unittest.TestCase):
+    def setUp(self):
+        from soroeditor_qt.MainWindow import MainWindow
+
+        self.directory = tempfile.mkdtemp()
+        self.window = MainWindow()
+        self.textEdits = self.window.textEditor.textEdits
+        for textEdit in self.textEdits:
+            textEdit.setPlainText("ab cd ab\n" * 5)
+        self.window.qAction["search"]["Search"].trigger()
+        self.searchWindow = self.window.subWindows["SearchWindow"]
+
+    def tearDown(self):
+        self.window.markAsSaved()
+        self.window.close()
+        self.window.deleteLater()
+        QCoreApplication.sendPostedEvents()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def highlightCounts(self) -> list[int]:
+        return [len(textEdit.extraSelections()) for textEdit in self.textEdits]
+
+    def test_closeClearsHighlights(self):
+        self.searchWindow.searchInput.setText("ab")
+        self.searchWindow.reset(wait=True)
+        self.assertEqual(self.highlightCounts(), [10, 10, 10])
+        self.searchWindow.close()
+        self.assertEqual(self.highlightCounts(), [0, 0, 0])
+
+    def test_closeClearsTermList(self):
+        filePath = os.path.join(self.directory, "terms.txt")
+        with open(filePath, mode="wt", encoding="utf-8") as f:
+            f.write("ab\ncd\n")
+        self.assertTrue(self.searchWindow.loadTermList(filePath))
+        self.assertEqual(self.highlightCounts(), [15, 15, 15])
+        self.searchWindow.close()
+        self.assertEqual(self.highlightCounts(), [0, 0, 0])
+        self.assertIsNone(self.window.subWindows["SearchWindow"])
+
+
+if __name__ == "__main__":
+    unittest.main()